@@ -0,0 +1,76 @@
+"""Add todos indexes
+
+Revision ID: 11df06d523df
+Revises: 9134a3b1217d
+Create Date: 2026-10-18 10:12:31.482907
+
+Indexes are built with CREATE INDEX CONCURRENTLY so the migration does not
+block writes on a large, live todos table. Query plans they enable:
+
+* ix_todos_user_id_status (user_id, status): get_todos with a status filter
+  and get_deleted_todos become an index range scan on both columns instead
+  of a sequential scan over every user's todos; the leading user_id column
+  also serves unfiltered get_todos and the todos_user_id_fkey lookups.
+* ix_todos_user_id_title (user_id, title) WHERE status != 'TRASH':
+  get_valid_todo resolves a title with an index scan over the user's live
+  todos only; trashed rows never enter the index.
+* ix_todos_status_updated_at (status, updated_at): trash_cleaner's
+  status = 'TRASH' AND updated_at <= :cutoff becomes a single range scan
+  ordered by age instead of a full table scan.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '11df06d523df'
+down_revision: Union[str, Sequence[str], None] = '9134a3b1217d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todos_user_id_status',
+            'todos',
+            ['user_id', 'status'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_todos_user_id_title',
+            'todos',
+            ['user_id', 'title'],
+            postgresql_where=sa.text("status != 'TRASH'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_todos_status_updated_at',
+            'todos',
+            ['status', 'updated_at'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todos_status_updated_at',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_todos_user_id_title',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_todos_user_id_status',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,43 @@
+"""Add users keyset index
+
+Revision ID: 1b5bfa74c6b9
+Revises: 6f2fb223b159
+Create Date: 2026-10-18 15:21:08.402117
+
+ix_users_created_at_id (created_at, id) serves the keyset pagination and
+the ordered stream of get_users, so a page deep into the table is an index
+range scan instead of a sort of every user.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b5bfa74c6b9'
+down_revision: Union[str, Sequence[str], None] = '6f2fb223b159'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_created_at_id',
+            'users',
+            ['created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_created_at_id',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,44 @@
+"""Add todos keyset index
+
+Revision ID: 5a0e7c2f9d41
+Revises: 11df06d523df
+Create Date: 2026-10-18 11:02:47.915634
+
+ix_todos_user_id_created_at_id (user_id, created_at, id) serves the keyset
+pagination of get_todos: WHERE user_id = :id AND (created_at, id) > :cursor
+ORDER BY created_at, id LIMIT :n is an index range scan that reads only the
+requested page, however deep the cursor is.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a0e7c2f9d41'
+down_revision: Union[str, Sequence[str], None] = '11df06d523df'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todos_user_id_created_at_id',
+            'todos',
+            ['user_id', 'created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todos_user_id_created_at_id',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,33 @@
+"""Add users todos_version
+
+Revision ID: 6f2fb223b159
+Revises: 5a0e7c2f9d41
+Create Date: 2026-10-18 14:27:09.553102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2fb223b159'
+down_revision: Union[str, Sequence[str], None] = '5a0e7c2f9d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'todos_version', sa.Integer(), server_default=sa.text('0'), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'todos_version')
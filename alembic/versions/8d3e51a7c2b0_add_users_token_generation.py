@@ -0,0 +1,36 @@
+"""Add users token_generation
+
+Revision ID: 8d3e51a7c2b0
+Revises: 1b5bfa74c6b9
+Create Date: 2026-10-18 16:02:44.918310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3e51a7c2b0'
+down_revision: Union[str, Sequence[str], None] = '1b5bfa74c6b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'token_generation',
+            sa.Integer(),
+            server_default=sa.text('0'),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_generation')
@@ -0,0 +1,64 @@
+"""Add todo tombstones and updated_at index
+
+Revision ID: a9c3e7f15d28
+Revises: f2a6c8e4d913
+Create Date: 2026-10-18 19:02:44.613870
+
+GET /todos/changes walks the todos of a user by (updated_at, id) after a
+watermark, and the todos hard-deleted since then by their tombstones. The
+todos index is built concurrently.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e7f15d28'
+down_revision: Union[str, Sequence[str], None] = 'f2a6c8e4d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'todo_tombstones',
+        sa.Column('todo_id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column(
+            'deleted_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('todo_id'),
+    )
+    op.create_index(
+        'ix_todo_tombstones_user_id_deleted_at_todo_id',
+        'todo_tombstones',
+        ['user_id', 'deleted_at', 'todo_id'],
+    )
+    op.create_index('ix_todo_tombstones_deleted_at', 'todo_tombstones', ['deleted_at'])
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todos_user_id_updated_at_id',
+            'todos',
+            ['user_id', 'updated_at', 'id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todos_user_id_updated_at_id',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
+    op.drop_index('ix_todo_tombstones_deleted_at', table_name='todo_tombstones')
+    op.drop_index(
+        'ix_todo_tombstones_user_id_deleted_at_todo_id', table_name='todo_tombstones'
+    )
+    op.drop_table('todo_tombstones')
@@ -0,0 +1,58 @@
+"""Order todos title index
+
+Revision ID: c47a09e3b5d2
+Revises: 8d3e51a7c2b0
+Create Date: 2026-10-18 16:40:17.205736
+
+get_valid_todo resolves a title to the oldest live todo with that title,
+ordered by (created_at, id). Appending those columns to the partial title
+index lets the ORDER BY ... LIMIT 1 stop at the first index entry instead
+of sorting every duplicate. The new index is built before the old one is
+dropped, both concurrently.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a09e3b5d2'
+down_revision: Union[str, Sequence[str], None] = '8d3e51a7c2b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todos_user_id_title_created_at_id',
+            'todos',
+            ['user_id', 'title', 'created_at', 'id'],
+            postgresql_where=sa.text("status != 'TRASH'"),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_todos_user_id_title',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todos_user_id_title',
+            'todos',
+            ['user_id', 'title'],
+            postgresql_where=sa.text("status != 'TRASH'"),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_todos_user_id_title_created_at_id',
+            table_name='todos',
+            postgresql_concurrently=True,
+        )
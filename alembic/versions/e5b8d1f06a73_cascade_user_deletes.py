@@ -0,0 +1,61 @@
+"""Cascade user deletes
+
+Revision ID: e5b8d1f06a73
+Revises: c47a09e3b5d2
+Create Date: 2026-10-18 17:05:52.660418
+
+todos_user_id_fkey gains ON DELETE CASCADE, so deleting a user removes its
+todos in the database instead of the ORM deleting them one by one. The
+constraint is recreated NOT VALID and validated afterwards, outside the
+migration transaction, so existing rows are checked without blocking
+writes. users.disabled marks accounts whose todos are still being purged,
+users.disabled_at records when they were disabled.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8d1f06a73'
+down_revision: Union[str, Sequence[str], None] = 'c47a09e3b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'disabled', sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+    op.add_column('users', sa.Column('disabled_at', sa.DateTime(), nullable=True))
+
+    op.drop_constraint('todos_user_id_fkey', 'todos', type_='foreignkey')
+    op.create_foreign_key(
+        'todos_user_id_fkey',
+        'todos',
+        'users',
+        ['user_id'],
+        ['id'],
+        ondelete='CASCADE',
+        postgresql_not_valid=True,
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute('ALTER TABLE todos VALIDATE CONSTRAINT todos_user_id_fkey')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('todos_user_id_fkey', 'todos', type_='foreignkey')
+    op.create_foreign_key(
+        'todos_user_id_fkey', 'todos', 'users', ['user_id'], ['id']
+    )
+
+    op.drop_column('users', 'disabled_at')
+    op.drop_column('users', 'disabled')
@@ -0,0 +1,49 @@
+"""Add todo_counts
+
+Revision ID: f2a6c8e4d913
+Revises: e5b8d1f06a73
+Create Date: 2026-10-18 17:48:30.117254
+
+todo_counts holds the number of todos per user and status, so
+GET /todos/stats reads at most five rows whatever the todo volume. Every
+write path keeps it in step within its own transaction; the table is
+backfilled here from the current todos.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c8e4d913'
+down_revision: Union[str, Sequence[str], None] = 'e5b8d1f06a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'todo_counts',
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column(
+            'status',
+            postgresql.ENUM(name='todostatus', create_type=False),
+            nullable=False,
+        ),
+        sa.Column('count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'status'),
+    )
+    op.execute(
+        'INSERT INTO todo_counts (user_id, status, count) '
+        'SELECT user_id, status, count(*) FROM todos GROUP BY user_id, status'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('todo_counts')
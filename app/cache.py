@@ -0,0 +1,227 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.redis_client import redis_client
+from app.schemas import UserPublic
+from app.settings import get_settings
+
+settings = get_settings()
+
+
+class TwoLevelCache(ABC):
+    """Two-level cache keyed by a token-derived subject.
+
+    The first level is an in-process LRU, the optional second level is shared
+    through Redis. An entry never outlives the token that populated it, and
+    other workers drop their local copy after at most ``ttl`` seconds.
+    """
+
+    prefix = ''
+
+    def __init__(self, ttl: int, maxsize: int, redis: Redis | None = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.redis = redis
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def redis_key(self, subject: str):
+        return f'{self.prefix}:{subject}'
+
+    @staticmethod
+    @abstractmethod
+    def encode(value): ...
+
+    @staticmethod
+    @abstractmethod
+    def decode(cached: bytes | str): ...
+
+    def expires_at(self, token_exp: float | None = None):
+        expires_at = time.time() + self.ttl
+        return min(expires_at, token_exp) if token_exp else expires_at
+
+    def store(self, subject: str, value, expires_at: float):
+        self.entries[subject] = (expires_at, value)
+        self.entries.move_to_end(subject)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    async def get(self, subject: str, token_exp: float | None = None):
+        if self.ttl <= 0:
+            return None
+
+        entry = self.entries.get(subject)
+        if entry:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self.entries.move_to_end(subject)
+                return value
+
+            del self.entries[subject]
+
+        if self.redis is None:
+            return None
+
+        try:
+            cached = await self.redis.get(self.redis_key(subject))
+        except RedisError:
+            return None
+
+        if cached is None:
+            return None
+
+        value = self.decode(cached)
+        self.store(subject, value, self.expires_at(token_exp))
+
+        return value
+
+    async def set(self, subject: str, value, token_exp: float | None = None):
+        if self.ttl <= 0:
+            return
+
+        expires_at = self.expires_at(token_exp)
+        self.store(subject, value, expires_at)
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self.redis_key(subject),
+                    self.encode(value),
+                    exat=int(expires_at),
+                )
+            except RedisError:
+                pass
+
+    async def invalidate(self, subject: str):
+        self.entries.pop(subject, None)
+
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self.redis_key(subject))
+            except RedisError:
+                pass
+
+    def clear(self):
+        self.entries.clear()
+
+
+class PrincipalCache(TwoLevelCache):
+    """Authenticated principals keyed by token subject."""
+
+    prefix = 'principal'
+
+    @staticmethod
+    def encode(value: UserPublic):
+        return value.model_dump_json()
+
+    @staticmethod
+    def decode(cached: bytes | str):
+        return UserPublic.model_validate_json(cached)
+
+
+class TokenGenerationCache(TwoLevelCache):
+    """Token generations keyed by user id, checked by stateless tokens.
+
+    A revoked token stays usable on other workers until their local copy
+    expires, so ``ttl`` bounds how late a password change takes effect.
+    """
+
+    prefix = 'token_generation'
+
+    @staticmethod
+    def encode(value: int):
+        return str(value)
+
+    @staticmethod
+    def decode(cached: bytes | str):
+        return int(cached)
+
+
+class CacheStats:
+    """Lookup outcomes of a cache, used to judge whether it pays off."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
+
+
+class PageCache:
+    """Redis cache of serialized todo pages.
+
+    Keys embed the ETag of the page, which carries the user's todos version,
+    so every todo mutation moves that user's listings to fresh keys and the
+    stale ones simply expire. Pages of other users are left alone.
+    """
+
+    def __init__(self, redis: Redis, ttl: int, enabled: bool = True):
+        self.redis = redis
+        self.ttl = ttl
+        self.enabled = enabled
+        self.stats = CacheStats()
+
+    @staticmethod
+    def redis_key(user_id: uuid.UUID, etag: str):
+        tag = etag.strip('"')
+        return f'todos:{user_id}:{tag}'
+
+    async def get(self, user_id: uuid.UUID, etag: str):
+        """Return the cached body and headers of a page, or None."""
+        if not self.enabled:
+            return None
+
+        try:
+            cached = await self.redis.hgetall(self.redis_key(user_id, etag))
+        except RedisError:
+            self.stats.errors += 1
+            return None
+
+        if not cached:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        body = cached.pop('body')
+
+        return body, cached
+
+    async def set(
+        self, user_id: uuid.UUID, etag: str, body: str, headers: dict[str, str]
+    ):
+        if not self.enabled:
+            return
+
+        key = self.redis_key(user_id, etag)
+        try:
+            async with self.redis.pipeline() as pipe:
+                pipe.hset(key, mapping={'body': body, **headers})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError:
+            self.stats.errors += 1
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    redis=redis_client if settings.PRINCIPAL_CACHE_REDIS else None,
+)
+token_generation_cache = TokenGenerationCache(
+    ttl=settings.TOKEN_GENERATION_CACHE_TTL,
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    redis=redis_client if settings.PRINCIPAL_CACHE_REDIS else None,
+)
+todo_page_cache = PageCache(
+    redis_client,
+    ttl=settings.TODO_LIST_CACHE_TTL,
+    enabled=settings.TODO_LIST_CACHE,
+)
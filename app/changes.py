@@ -0,0 +1,91 @@
+import heapq
+import uuid
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Timestamp, Todo, TodoTombstone
+from app.pagination import decode_cursor, encode_cursor
+from app.responses import schema_columns
+from app.schemas import TodoPublic
+from app.settings import get_settings
+
+settings = get_settings()
+
+
+async def todo_changes(
+    session: AsyncSession, user_id: uuid.UUID, since: str | None, limit: int
+):
+    """Select the todos written and deleted after the ``since`` watermark.
+
+    A watermark encodes the (timestamp, id) of the last change sent, so both
+    streams are range scans of their (user_id, timestamp, id) indexes. Each
+    stream reads at most ``limit + 1`` rows and the oldest ``limit`` changes
+    of the two are returned.
+
+    Timestamps come from the start of the writing transaction, so a write
+    may commit after later ones were sent. Once caught up, the watermark is
+    therefore set ``TODO_CHANGES_SAFETY_WINDOW`` seconds back, and the next
+    call sends the most recent changes again. ``now`` is read from the
+    database, whose clock wrote the timestamps, as the naive value the write
+    paths store. Watermarks older than the tombstones kept are refused with
+    410, the client must resync in full.
+    """
+    dialect = session.get_bind().dialect
+    now = await session.scalar(
+        select(
+            func.localtimestamp()
+            if dialect.name == 'postgresql'
+            else type_coerce(func.now(), Timestamp)
+        )
+    )
+    after = (datetime.min, uuid.UUID(int=0))
+    if since is not None:
+        after = decode_cursor(since)
+        if after[0] < now - timedelta(days=settings.TODO_TOMBSTONE_EXPIRE_DAYS):
+            raise HTTPException(
+                status_code=HTTPStatus.GONE,
+                detail='Watermark expired, fetch the full list again.',
+            )
+
+    todos = await session.execute(
+        select(*schema_columns(TodoPublic, Todo), Todo.updated_at)
+        .where(Todo.user_id == user_id, tuple_(Todo.updated_at, Todo.id) > after)
+        .order_by(Todo.updated_at, Todo.id)
+        .limit(limit + 1)
+    )
+    tombstones = await session.execute(
+        select(TodoTombstone.todo_id, TodoTombstone.deleted_at)
+        .where(
+            TodoTombstone.user_id == user_id,
+            tuple_(TodoTombstone.deleted_at, TodoTombstone.todo_id) > after,
+        )
+        .order_by(TodoTombstone.deleted_at, TodoTombstone.todo_id)
+        .limit(limit + 1)
+    )
+
+    changes = list(
+        heapq.merge(
+            ((todo.updated_at, todo.id, todo) for todo in todos),
+            ((deleted_at, todo_id, None) for todo_id, deleted_at in tombstones),
+            key=lambda change: change[:2],
+        )
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if has_more:
+        watermark = encode_cursor(*changes[-1][:2])
+    else:
+        settled = now - timedelta(seconds=settings.TODO_CHANGES_SAFETY_WINDOW)
+        watermark = encode_cursor(settled, uuid.UUID(int=0))
+
+    return {
+        'todos': [todo._asdict() for _, _, todo in changes if todo is not None],
+        'deleted': [todo_id for _, todo_id, todo in changes if todo is None],
+        'watermark': watermark,
+        'has_more': has_more,
+    }
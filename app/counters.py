@@ -0,0 +1,106 @@
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+
+from sqlalchemy import Dialect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Todo, TodoCount, TodoStatus
+
+CountDeltas = Counter[tuple[uuid.UUID, TodoStatus]]
+
+
+def upsert_todo_counts(dialect: Dialect, deltas: CountDeltas):
+    """Build one INSERT ... ON CONFLICT adding ``deltas`` to the counters.
+
+    Rows are sorted so concurrent writers lock the counters in the same
+    order. Returns None when there is nothing to add.
+    """
+    rows = [
+        {'user_id': user_id, 'status': status, 'count': delta}
+        for (user_id, status), delta in sorted(deltas.items())
+        if delta
+    ]
+    if not rows:
+        return None
+
+    insert = postgresql.insert if dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(TodoCount).values(rows)
+
+    return statement.on_conflict_do_update(
+        index_elements=[TodoCount.user_id, TodoCount.status],
+        set_={'count': TodoCount.count + statement.excluded.count},
+    )
+
+
+async def add_todo_counts(session: AsyncSession, deltas: CountDeltas):
+    statement = upsert_todo_counts(session.get_bind().dialect, deltas)
+    if statement is not None:
+        await session.execute(statement)
+
+
+async def count_new_todos(
+    session: AsyncSession, user_id: uuid.UUID, statuses: Iterable[str]
+):
+    await add_todo_counts(
+        session, Counter((user_id, TodoStatus(status)) for status in statuses)
+    )
+
+
+def status_update_returning(where: list, values: dict):
+    """UPDATE the matching todos, RETURNING each with its previous status.
+
+    The old statuses come from a CTE locking the rows, which PostgreSQL can
+    reference in RETURNING.
+    """
+    old = (
+        select(Todo.id, Todo.status.label('old_status'))
+        .where(*where)
+        .with_for_update()
+        .cte('old')
+    )
+
+    return (
+        update(Todo)
+        .where(Todo.id == old.c.id)
+        .values(values)
+        .returning(Todo, old.c.old_status)
+    )
+
+
+def status_deltas(rows: Iterable[tuple[Todo, TodoStatus | None]]):
+    """Count deltas of ``(todo, old_status)`` rows, skipping unknown old ones."""
+    deltas = Counter()
+    for db_todo, old_status in rows:
+        if old_status is not None and old_status != db_todo.status:
+            deltas[db_todo.user_id, old_status] -= 1
+            deltas[db_todo.user_id, db_todo.status] += 1
+
+    return deltas
+
+
+async def update_todos(session: AsyncSession, where: list, values: dict):
+    """UPDATE the matching todos, RETURNING them, and move their counts.
+
+    A status change needs the old status of every row. PostgreSQL reads it
+    in the same statement from a locked CTE; other databases select it
+    first, and ``reconcile_todo_counts`` repairs a race in between.
+    """
+    query = update(Todo).where(*where).values(values)
+
+    if 'status' not in values:
+        return (await session.scalars(query.returning(Todo))).all()
+
+    if session.get_bind().dialect.name == 'postgresql':
+        rows = (await session.execute(status_update_returning(where, values))).all()
+    else:
+        old_statuses = dict(
+            (await session.execute(select(Todo.id, Todo.status).where(*where))).all()
+        )
+        db_todos = (await session.scalars(query.returning(Todo))).all()
+        rows = [(db_todo, old_statuses.get(db_todo.id)) for db_todo in db_todos]
+
+    await add_todo_counts(session, status_deltas(rows))
+
+    return [db_todo for db_todo, _ in rows]
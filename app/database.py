@@ -1,12 +1,185 @@
+import logging
 import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class PoolStats:
+    """Connection checkout wait times, used to size the pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def as_dict(self):
+        return {
+            'checkouts': self.checkouts,
+            'wait_total': round(self.wait_total, 6),
+            'wait_max': round(self.wait_max, 6),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedPoolMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            wait = time.perf_counter() - start
+            pool_stats.record(wait)
+
+            if wait >= settings.DB_POOL_SLOW_CHECKOUT:
+                logger.warning(
+                    'Waited %.3fs for a database connection: %s', wait, self.status()
+                )
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class QueryStats:
+    """Statements executed and time spent in the database by one request."""
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+
+    def record(self, duration: float):
+        self.statements += 1
+        self.duration += duration
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    'current_query_stats', default=None
+)
+
+
+@contextmanager
+def track_queries():
+    """Count the statements run in this context, e.g. by one request."""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def redact_parameters(parameters, executemany: bool):
+    if executemany:
+        return f'<{len(parameters)} parameter sets>'
+
+    if isinstance(parameters, dict):
+        return {key: '?' for key in parameters}
+
+    return tuple('?' for _ in parameters or ())
+
+
+def before_cursor_execute(conn, *args):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, *args):
+    duration = time.perf_counter() - conn.info['query_start'].pop()
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(duration)
+
+    if duration >= settings.DB_SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            'Slow query (%.3fs): %s; parameters: %s',
+            duration,
+            statement,
+            redact_parameters(parameters, context.executemany),
+        )
+
+
+def handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_start'):
+        connection.info['query_start'].pop()
+
+
+def instrument_engine(engine: Engine):
+    """Hook query accounting and the slow query log into ``engine``."""
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'handle_error', handle_error)
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Enforce foreign keys, and so ``ON DELETE CASCADE``, as PostgreSQL does."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def engine_options(url: str, settings: Settings):
+    options = {
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+
+    if make_url(url).get_backend_name() == 'postgresql':
+        # Transaction poolers hand each transaction a different server
+        # connection, so server-side prepared statements cannot be reused.
+        options['connect_args'] = {
+            'prepare_threshold': (
+                None if settings.DB_PGBOUNCER else settings.DB_PREPARE_THRESHOLD
+            )
+        }
+
+    return options
+
 
 url = os.environ.get('DATABASE_URL')
-sync_engine = create_engine(url)
-async_engine = create_async_engine(url)
+sync_engine = create_engine(
+    url,
+    poolclass=(
+        TimedAsyncQueuePool if make_url(url).get_dialect().is_async else TimedQueuePool
+    ),
+    **engine_options(url, settings),
+)
+async_engine = create_async_engine(
+    url, poolclass=TimedAsyncQueuePool, **engine_options(url, settings)
+)
+
+instrument_engine(sync_engine)
+instrument_engine(async_engine.sync_engine)
+
+if make_url(url).get_backend_name() == 'sqlite':
+    event.listen(sync_engine, 'connect', enable_sqlite_foreign_keys)
+    event.listen(async_engine.sync_engine, 'connect', enable_sqlite_foreign_keys)
 
 sync_session_factory = sessionmaker(sync_engine, expire_on_commit=False)
 async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
@@ -1,14 +1,18 @@
 import uuid
+from collections import Counter
 from http import HTTPStatus
 from typing import Annotated
 
 import jwt
 from fastapi import Depends, HTTPException
-from sqlalchemy import or_, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import principal_cache, token_generation_cache
+from app.counters import add_todo_counts, update_todos
 from app.database import get_session
 from app.models import Todo, TodoStatus, User
+from app.schemas import Principal, UserPublic
 from app.security import Token
 from app.settings import get_settings
 
@@ -16,55 +20,208 @@ Session = Annotated[AsyncSession, Depends(get_session)]
 settings = get_settings()
 
 
-async def get_current_user(token: Token, session: Session):
-    credentials_exception = HTTPException(
+def credentials_exception():
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
+
+async def get_token_generation(
+    session: AsyncSession, user_id: uuid.UUID, token_exp: float | None = None
+):
+    generation = await token_generation_cache.get(str(user_id), token_exp)
+    if generation is not None:
+        return generation
+
+    generation = await session.scalar(
+        select(User.token_generation).where(User.id == user_id)
+    )
+    if generation is not None:
+        await token_generation_cache.set(str(user_id), generation, token_exp)
+
+    return generation
+
+
+async def decode_access_token(token: str, session: AsyncSession):
+    """Return the claims of a valid token.
+
+    Stateless tokens also carry the user id and token generation, and are
+    rejected once the user's generation has moved past theirs.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
 
         username = payload.get('sub')
         if not username:
-            raise credentials_exception
+            raise credentials_exception()
 
     except jwt.ExpiredSignatureError, jwt.DecodeError, jwt.InvalidTokenError:
-        raise credentials_exception
+        raise credentials_exception()
+
+    if 'gen' in payload:
+        try:
+            user_id = uuid.UUID(payload.get('uid'))
+        except TypeError, ValueError:
+            raise credentials_exception()
+
+        generation = await get_token_generation(session, user_id, payload.get('exp'))
+        if generation is None or generation != payload['gen']:
+            raise credentials_exception()
+
+    return payload
+
 
-    user = await session.scalar(select(User).where(User.email == username))
+async def load_principal(payload: dict, session: AsyncSession):
+    username = payload['sub']
+
+    principal = await principal_cache.get(username, payload.get('exp'))
+    if principal:
+        return principal
+
+    user = (
+        await session.execute(
+            select(User.id, User.username, User.email).where(
+                User.email == username, User.disabled.is_(False)
+            )
+        )
+    ).first()
 
     if not user:
-        raise credentials_exception
+        raise credentials_exception()
+
+    principal = UserPublic.model_validate(user._asdict())
+    await principal_cache.set(username, principal, payload.get('exp'))
+
+    return principal
+
+
+async def get_current_user(token: Token, session: Session):
+    return await load_principal(await decode_access_token(token, session), session)
+
+
+async def get_current_principal(token: Token, session: Session):
+    """Resolve the caller for routes that only need its id and email.
+
+    A stateless token answers from its own claims once its generation is
+    checked, so the users table is not read; other tokens load the user.
+    """
+    payload = await decode_access_token(token, session)
+
+    if 'gen' in payload:
+        return Principal(id=payload['uid'], email=payload['sub'])
 
-    return user
+    return await load_principal(payload, session)
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
+
+def live_todo_params(current_user: Principal):
+    return (Todo.user_id == current_user.id, Todo.status != TodoStatus.TRASH)
+
+
+def title_lookup(current_user: Principal, title: str, *entities):
+    """Select the oldest live todo of the user with ``title``.
+
+    Titles are not unique, ties are broken by id, in the order of the
+    ix_todos_user_id_title_created_at_id index.
+    """
+    return (
+        select(*entities)
+        .where(*live_todo_params(current_user), Todo.title == title)
+        .order_by(Todo.created_at, Todo.id)
+        .limit(1)
+    )
+
+
+def parse_todo_id(todo_id_or_title: str):
+    try:
+        return uuid.UUID(todo_id_or_title)
+    except ValueError:
+        return None
+
+
+def todo_not_found():
+    return HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Todo not found.')
 
 
 async def get_valid_todo(
     session: Session,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     todo_id_or_title: str,
 ):
-    try:
-        todo_id = uuid.UUID(todo_id_or_title)
-    except ValueError:
-        todo_id = None
-
-    db_todo = await session.scalar(
-        select(Todo).where(
-            Todo.user_id == current_user.id,
-            Todo.status != TodoStatus.TRASH,
-            or_(
-                Todo.title == todo_id_or_title, Todo.id == todo_id if todo_id else False
-            ),
+    """Resolve a live todo of the user by id, or else by title.
+
+    An id is a primary key lookup, a title resolves as in ``title_lookup``.
+    """
+    db_todo = None
+
+    todo_id = parse_todo_id(todo_id_or_title)
+    if todo_id is not None:
+        db_todo = await session.scalar(
+            select(Todo).where(Todo.id == todo_id, *live_todo_params(current_user))
+        )
+
+    if db_todo is None:
+        db_todo = await session.scalar(
+            title_lookup(current_user, todo_id_or_title, Todo)
         )
-    )
 
     if not db_todo:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Todo not found.')
+        raise todo_not_found()
 
     return db_todo
+
+
+async def update_valid_todo(
+    session: AsyncSession,
+    current_user: Principal,
+    todo_id_or_title: str,
+    values: dict,
+):
+    """Apply ``values`` to the todo ``get_valid_todo`` resolves and return it.
+
+    Each lookup path is one ``update_todos`` call, the title one through a
+    subquery. Databases without UPDATE ... RETURNING load the todo first.
+    """
+    if not session.get_bind().dialect.update_returning:
+        db_todo = await get_valid_todo(session, current_user, todo_id_or_title)
+        old_status = db_todo.status
+        for key, value in values.items():
+            setattr(db_todo, key, value)
+
+        await session.flush()
+        await session.refresh(db_todo)
+
+        if db_todo.status != old_status:
+            await add_todo_counts(
+                session,
+                Counter({
+                    (db_todo.user_id, old_status): -1,
+                    (db_todo.user_id, db_todo.status): 1,
+                }),
+            )
+
+        return db_todo
+
+    matches = [
+        Todo.id
+        == title_lookup(current_user, todo_id_or_title, Todo.id)
+        .correlate(None)
+        .scalar_subquery()
+    ]
+    todo_id = parse_todo_id(todo_id_or_title)
+    if todo_id is not None:
+        matches.insert(0, Todo.id == todo_id)
+
+    for match in matches:
+        db_todos = await update_todos(
+            session, [match, *live_todo_params(current_user)], values
+        )
+        if db_todos:
+            return db_todos[0]
+
+    raise todo_not_found()
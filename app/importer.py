@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import uuid
+from collections.abc import Iterator
+from itertools import islice
+from typing import IO
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.counters import count_new_todos
+from app.models import Todo
+from app.schemas import FileFormat, TodoBulkCreate
+from app.settings import get_settings
+from app.versioning import bump_todos_version
+
+settings = get_settings()
+
+COPY_COLUMNS = ('id', 'user_id', 'title', 'description', 'status')
+
+
+def read_rows(file: IO[bytes], file_format: FileFormat):
+    """Yield ``(line, row)`` pairs, ``row`` being None when unparsable."""
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='')
+
+    if file_format == FileFormat.CSV:
+        reader = csv.DictReader(text)
+        for row in reader:
+            if not row.get('status'):
+                row.pop('status', None)
+
+            yield reader.line_num, row
+
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError:
+            yield line_number, None
+
+
+def read_chunk(rows: Iterator[tuple[int, dict | None]]):
+    return list(islice(rows, settings.TODO_IMPORT_CHUNK_SIZE))
+
+
+def validate_chunk(chunk: list, user_id: uuid.UUID):
+    rows, errors = [], []
+
+    for line_number, row in chunk:
+        try:
+            new_todo = TodoBulkCreate.model_validate(row)
+        except ValidationError:
+            errors.append({'line': line_number, 'detail': 'Invalid todo.'})
+            continue
+
+        rows.append({
+            'id': uuid.uuid4(),
+            'user_id': user_id,
+            'title': new_todo.title,
+            'description': new_todo.description,
+            'status': new_todo.status.value,
+        })
+
+    return rows, errors
+
+
+async def copy_todos(session: AsyncSession, rows: list[dict]):
+    connection = await session.connection()
+
+    if connection.dialect.name != 'postgresql':
+        await session.execute(insert(Todo), rows)
+        return
+
+    raw_connection = await connection.get_raw_connection()
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy(
+            f'COPY todos ({", ".join(COPY_COLUMNS)}) FROM STDIN'
+        ) as copy:
+            for row in rows:
+                await copy.write_row([row[column] for column in COPY_COLUMNS])
+
+
+async def import_todos(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    file: IO[bytes],
+    file_format: FileFormat,
+):
+    """Load todos chunk by chunk, yielding progress after each commit.
+
+    The file is read and parsed in the thread pool, off the event loop. A
+    file that cannot be decoded or parsed ends the import with a final
+    progress line carrying an ``error``; chunks before it stay imported.
+    """
+    imported = rejected = 0
+    rows = read_rows(file, file_format)
+
+    while True:
+        try:
+            chunk = await run_in_threadpool(read_chunk, rows)
+        except UnicodeDecodeError:
+            error = 'File is not valid UTF-8.'
+        except csv.Error as exc:
+            error = f'Invalid CSV: {exc}.'
+        else:
+            error = None
+
+        if error is not None:
+            yield {
+                'imported': imported,
+                'rejected': rejected,
+                'errors': [],
+                'error': error,
+            }
+            break
+
+        if not chunk:
+            break
+
+        valid_rows, errors = validate_chunk(chunk, user_id)
+        if valid_rows:
+            await copy_todos(session, valid_rows)
+            await count_new_todos(
+                session, user_id, (row['status'] for row in valid_rows)
+            )
+            await bump_todos_version(session, user_id)
+            await session.commit()
+
+        imported += len(valid_rows)
+        rejected += len(errors)
+
+        yield {'imported': imported, 'rejected': rejected, 'errors': errors}
@@ -3,10 +3,13 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from app.routers import auth, todos, users
+from app.metrics import MetricsMiddleware, QueryAccountingMiddleware
+from app.routers import auth, metrics, todos, users
+from app.settings import get_settings
 
 logger = logging.getLogger('uvicorn.error')
 logging.basicConfig(level=logging.INFO)
+settings = get_settings()
 
 
 @asynccontextmanager
@@ -21,6 +24,12 @@ app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(todos.router)
 
+app.add_middleware(QueryAccountingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
 
 @app.get('/')
 async def root():
@@ -0,0 +1,334 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable
+from contextlib import contextmanager
+
+from redis import Redis
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import track_queries
+from app.settings import get_settings
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+TRASH_CLEANER_STATS_KEY = 'metrics:trash_cleaner'
+settings = get_settings()
+
+
+def format_value(value: float):
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(labelnames: tuple[str, ...], labels: tuple[str, ...]):
+    if not labelnames:
+        return ''
+
+    pairs = (
+        '{}="{}"'.format(
+            name,
+            value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'),
+        )
+        for name, value in zip(labelnames, labels)
+    )
+    return '{' + ','.join(pairs) + '}'
+
+
+class Metric(ABC):
+    """A metric family in the Prometheus text exposition format.
+
+    Updates only touch a dict entry, so they are cheap enough for every
+    request. The values live in this process: run one scrape target per
+    worker.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self):
+        """Yield ``(suffix, labelnames, labels, value)`` for every sample."""
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        for suffix, labelnames, labels, value in self.samples():
+            lines.append(
+                f'{self.name}{suffix}{format_labels(labelnames, labels)} '
+                f'{format_value(value)}'
+            )
+
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A total that only goes up.
+
+    With ``callback`` the value is read on scrape instead, either a number or
+    a dict of label tuples to numbers.
+    """
+
+    type = 'counter'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        callback: Callable[[], float | dict] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        values = self.values
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+
+        return [('', self.labelnames, labels, v) for labels, v in values.items()]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, amount: float = 1, *labels: str):
+        self.inc(-amount, *labels)
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            # One count per bucket plus +Inf, then the sum.
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        bucket_labelnames = (*self.labelnames, 'le')
+
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), series):
+                cumulative += count
+                yield (
+                    '_bucket',
+                    bucket_labelnames,
+                    (*labels, format_value(bound)),
+                    cumulative,
+                )
+
+            yield '_sum', self.labelnames, labels, series[-1]
+            yield '_count', self.labelnames, labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, *extra: Metric):
+        return '\n'.join(metric.render() for metric in (*self.metrics, *extra)) + '\n'
+
+
+registry = Registry()
+
+http_requests_in_flight = registry.register(
+    Gauge('http_requests_in_flight', 'HTTP requests currently being served.')
+)
+http_request_duration = registry.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'HTTP request latency by route template.',
+        ('method', 'route', 'status'),
+    )
+)
+limiter_redis_duration = registry.register(
+    Histogram(
+        'login_limiter_redis_duration_seconds',
+        'Latency of the login limiter Redis round-trips.',
+        ('operation',),
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    )
+)
+http_request_db_statements = registry.register(
+    Histogram(
+        'http_request_db_statements',
+        'Database statements per request by route template.',
+        ('method', 'route'),
+        buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+    )
+)
+password_hash_duration = registry.register(
+    Histogram(
+        'password_hash_duration_seconds',
+        'Argon2 hash and verify time, including the wait for a worker.',
+        ('operation',),
+    )
+)
+
+
+def record_trash_cleaner_run(redis: Redis, stats: dict):
+    """Store a ``trash_cleaner`` run for the API workers to expose.
+
+    The task runs in a Celery worker, so its stats travel through Redis.
+    """
+    with redis.pipeline() as pipe:
+        pipe.hset(
+            TRASH_CLEANER_STATS_KEY,
+            mapping={
+                'last_run_timestamp': time.time(),
+                'last_deleted': stats['deleted'],
+                'last_batches': stats['batches'],
+                'last_duration_seconds': stats['duration'],
+            },
+        )
+        pipe.hincrby(TRASH_CLEANER_STATS_KEY, 'runs_total', 1)
+        pipe.hincrby(TRASH_CLEANER_STATS_KEY, 'deleted_total', stats['deleted'])
+        pipe.execute()
+
+
+def trash_cleaner_metrics(stats: dict[str, str]):
+    metrics = []
+    for field, value in sorted(stats.items()):
+        metric_type = Counter if field.endswith('_total') else Gauge
+        metrics.append(
+            metric_type(
+                f'trash_cleaner_{field}',
+                f'trash_cleaner {field.replace("_", " ")}.',
+                callback=lambda value=value: float(value),
+            )
+        )
+
+    return metrics
+
+
+class MetricsMiddleware:
+    """Records in-flight requests and latency per route template.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware``, so it adds no task or
+    body buffering to the request path. Unmatched paths share one label to
+    keep the series count bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = '500'
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = str(message['status'])
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get('route')
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                scope['method'],
+                getattr(route, 'path_format', '<unmatched>'),
+                status,
+            )
+
+
+class QueryAccountingMiddleware:
+    """Counts the statements and database time of every request.
+
+    The counts feed ``http_request_db_statements``; with ``DEBUG`` they are
+    also sent back in a ``Server-Timing`` header. Statements run after the
+    response has started, e.g. while streaming, only reach the histogram.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message):
+                if settings.DEBUG and message['type'] == 'http.response.start':
+                    MutableHeaders(scope=message).append(
+                        'Server-Timing',
+                        f'db;dur={stats.duration * 1000:.2f};'
+                        f'desc="{stats.statements} statements"',
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get('route')
+                http_request_db_statements.observe(
+                    stats.statements,
+                    scope['method'],
+                    getattr(route, 'path_format', '<unmatched>'),
+                )
@@ -4,43 +4,88 @@ import uuid
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import ForeignKey, Uuid, func
+from sqlalchemy import DateTime, ForeignKey, Index, Uuid, false, func, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 from app.schemas import TodoStatus
 
 table_registry = registry()
 
+# SQLite stores server-side now() as 'YYYY-MM-DD HH:MM:SS', so bound datetimes
+# must use the same text format for comparisons (e.g. keyset cursors) to hold.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format=(
+            '%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d'
+        )
+    ),
+    'sqlite',
+)
+
 
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __table_args__ = (Index('ix_users_created_at_id', 'created_at', 'id'),)
 
     username: Mapped[str] = mapped_column(unique=True)
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str] = mapped_column(nullable=False, repr=False)
+    todos_version: Mapped[int] = mapped_column(
+        init=False, default=0, server_default=text('0')
+    )
+    token_generation: Mapped[int] = mapped_column(
+        init=False, default=0, server_default=text('0')
+    )
+    disabled: Mapped[bool] = mapped_column(
+        init=False, default=False, server_default=false()
+    )
+    disabled_at: Mapped[datetime | None] = mapped_column(
+        Timestamp, init=False, default=None
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         Uuid, primary_key=True, insert_default=uuid.uuid4, default_factory=uuid.uuid4
     )
-    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(
+        Timestamp, init=False, server_default=func.now()
+    )
     updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now(), onupdate=func.now()
+        Timestamp, init=False, server_default=func.now(), onupdate=func.now()
     )
 
     todos: Mapped[List[Todo]] = relationship(
         init=False,
         back_populates='user',
-        lazy='selectin',
+        lazy='raise',
         cascade='all, delete-orphan',
+        passive_deletes=True,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __table_args__ = (
+        Index('ix_todos_user_id_status', 'user_id', 'status'),
+        Index(
+            'ix_todos_user_id_title_created_at_id',
+            'user_id',
+            'title',
+            'created_at',
+            'id',
+            postgresql_where=text("status != 'TRASH'"),
+            sqlite_where=text("status != 'TRASH'"),
+        ),
+        Index('ix_todos_status_updated_at', 'status', 'updated_at'),
+        Index('ix_todos_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        Index('ix_todos_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
 
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('users.id'))
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
 
     title: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[str] = mapped_column(nullable=True)
@@ -52,13 +97,52 @@ class Todo:
     id: Mapped[uuid.UUID] = mapped_column(
         Uuid, primary_key=True, insert_default=uuid.uuid4, default_factory=uuid.uuid4
     )
-    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(
+        Timestamp, init=False, server_default=func.now()
+    )
     updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now(), onupdate=func.now()
+        Timestamp, init=False, server_default=func.now(), onupdate=func.now()
     )
 
     user: Mapped[User] = relationship(
         init=False,
         back_populates='todos',
-        lazy='selectin',
+        lazy='raise',
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TodoCount:
+    """Number of todos of a user in a status, kept by ``app.counters``."""
+
+    __tablename__ = 'todo_counts'
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    status: Mapped[TodoStatus] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0, server_default=text('0'))
+
+
+@table_registry.mapped_as_dataclass
+class TodoTombstone:
+    """A hard-deleted todo, kept for ``GET /todos/changes`` until it expires."""
+
+    __tablename__ = 'todo_tombstones'
+    __table_args__ = (
+        Index(
+            'ix_todo_tombstones_user_id_deleted_at_todo_id',
+            'user_id',
+            'deleted_at',
+            'todo_id',
+        ),
+        Index('ix_todo_tombstones_deleted_at', 'deleted_at'),
+    )
+
+    todo_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    deleted_at: Mapped[datetime] = mapped_column(
+        Timestamp, init=False, server_default=func.now()
     )
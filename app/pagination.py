@@ -0,0 +1,47 @@
+import base64
+import json
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import Row, Select, tuple_
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(UTC).replace(tzinfo=None)
+
+        return created_at, uuid.UUID(id)
+
+    except ValueError, TypeError:
+        raise ValueError('Invalid cursor.')
+
+
+def paginate(query: Select, model: type, limit: int, offset: int, cursor: str | None):
+    """Order ``query`` by (created_at, id) and select one page of it.
+
+    With a cursor the page starts right after the cursor row, which the
+    (created_at, id) indexes turn into a range scan at any depth.
+    """
+    query = query.order_by(model.created_at, model.id).limit(limit)
+
+    if cursor:
+        return query.where(tuple_(model.created_at, model.id) > decode_cursor(cursor))
+
+    return query.offset(offset)
+
+
+def next_cursor_headers(rows: list[Row], limit: int):
+    if len(rows) < limit:
+        return {}
+
+    return {NEXT_CURSOR_HEADER: encode_cursor(rows[-1].created_at, rows[-1].id)}
@@ -0,0 +1,60 @@
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+from app.metrics import limiter_redis_duration
+from app.redis_client import redis_client
+from app.settings import get_settings
+
+settings = get_settings()
+
+
+class SlidingWindowLimiter:
+    """Sliding-window attempt limiter, one atomic Redis round-trip per check.
+
+    Every key is a sorted set of attempt timestamps, trimmed to the window and
+    to ``limit`` entries, and expires one window after the last attempt. The
+    trim, record and count for all keys run in a single MULTI/EXEC.
+    """
+
+    def __init__(self, redis: Redis, prefix: str, limit: int, window: int):
+        self.redis = redis
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+
+    def key(self, identifier: str):
+        return f'{self.prefix}:{identifier}'
+
+    async def hit(self, *identifiers: str):
+        """Record an attempt and return whether every identifier is under limit."""
+        now = time.time()
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for identifier in identifiers:
+                key = self.key(identifier)
+                pipe.zremrangebyscore(key, 0, now - self.window)
+                pipe.zadd(key, {uuid.uuid4().hex: now})
+                pipe.zremrangebyrank(key, 0, -(self.limit + 1))
+                pipe.zcard(key)
+                pipe.expire(key, self.window)
+
+            with limiter_redis_duration.time('hit'):
+                results = await pipe.execute()
+
+        return max(results[3::5]) < self.limit
+
+    async def reset(self, *identifiers: str):
+        with limiter_redis_duration.time('reset'):
+            await self.redis.delete(
+                *(self.key(identifier) for identifier in identifiers)
+            )
+
+
+login_limiter = SlidingWindowLimiter(
+    redis_client,
+    prefix='login',
+    limit=settings.LOGIN_ATTEMPTS_LIMIT,
+    window=settings.LOGIN_LOCKOUT_TIME,
+)
@@ -0,0 +1,24 @@
+import redis
+from redis.asyncio import ConnectionPool, Redis
+
+from app.settings import get_settings
+
+settings = get_settings()
+
+redis_pool = ConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    decode_responses=True,
+)
+redis_client = Redis(connection_pool=redis_pool)
+
+# For the Celery workers, which run outside the event loop.
+sync_redis_client = redis.Redis.from_url(
+    settings.REDIS_URL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    decode_responses=True,
+)
@@ -0,0 +1,40 @@
+from collections.abc import Sequence
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import Row
+
+
+def schema_columns(schema: type[BaseModel], model: type):
+    """Columns of ``model`` backing the fields of ``schema``, in field order."""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+def dump_rows(rows: Sequence[Row], schema: type[BaseModel]):
+    """Serialize column rows straight to a JSON array of ``schema`` objects.
+
+    No model is built per row, so the rows must come from a select of
+    ``schema_columns`` that already satisfies the schema.
+    """
+    fields = tuple(schema.model_fields)
+    return to_json([{field: getattr(row, field) for field in fields} for row in rows])
+
+
+def dump_ndjson(rows: Sequence[Row], schema: type[BaseModel]):
+    """Serialize column rows as newline-delimited ``schema`` objects."""
+    fields = tuple(schema.model_fields)
+    return b''.join(
+        to_json({field: getattr(row, field) for field in fields}) + b'\n'
+        for row in rows
+    )
+
+
+def rows_response(
+    rows: Sequence[Row],
+    schema: type[BaseModel],
+    headers: dict[str, str] | None = None,
+):
+    return Response(
+        dump_rows(rows, schema), media_type='application/json', headers=headers
+    )
@@ -1,25 +1,21 @@
-import asyncio
 from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_session
-from app.dependencies import get_current_user
-from app.models import User
-from app.security import authenticate_user, create_access_token
+from app.dependencies import get_current_user, get_token_generation
+from app.rate_limit import login_limiter
+from app.schemas import UserPublic
+from app.security import authenticate_user, create_access_token, token_claims
 from app.settings import get_settings
 
 Session = Annotated[AsyncSession, Depends(get_session)]
 AuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
 router = APIRouter(prefix='/auth', tags=['auth'])
-
-
-r = Redis(host='redis', port=6379, decode_responses=True)
 settings = get_settings()
 
 
@@ -27,24 +23,15 @@ settings = get_settings()
 async def login_for_access_token(
     request: Request, form_data: AuthForm, session: Session
 ):
-    username_key = f'login:{form_data.username}'
     ip = (
         request.headers
         .get('x-forwarded-for', request.client.host)
         .split(',')[0]
         .strip()
     )
-    ip_key = f'login:{ip}'
-
-    username_attempts, ip_attempts = await asyncio.gather(
-        r.incr(username_key), r.incr(ip_key)
-    )
+    identifiers = (f'user:{form_data.username}', f'ip:{ip}')
 
-    if max(username_attempts, ip_attempts) >= settings.LOGIN_ATTEMPTS_LIMIT:
-        await asyncio.gather(
-            r.expire(username_key, settings.LOGIN_LOCKOUT_TIME),
-            r.expire(ip_key, settings.LOGIN_LOCKOUT_TIME),
-        )
+    if not await login_limiter.hit(*identifiers):
         raise HTTPException(
             status_code=HTTPStatus.TOO_MANY_REQUESTS, detail='Too many attempts.'
         )
@@ -58,17 +45,26 @@ async def login_for_access_token(
             headers={'WWW-Authenticate': 'Bearer'},
         )
 
-    await asyncio.gather(r.delete(username_key), r.delete(ip_key))
+    await login_limiter.reset(*identifiers)
+    generation = user.token_generation if settings.STATELESS_ACCESS_TOKENS else None
 
     return {
-        'access_token': create_access_token(data={'sub': user.email}),
+        'access_token': create_access_token(
+            data=token_claims(user.email, user.id, generation)
+        ),
         'token_type': 'bearer',
     }
 
 
 @router.get('/token')
-async def refresh_access_token(current_user: CurrentUser):
+async def refresh_access_token(current_user: CurrentUser, session: Session):
+    generation = None
+    if settings.STATELESS_ACCESS_TOKENS:
+        generation = await get_token_generation(session, current_user.id)
+
     return {
-        'access_token': create_access_token(data={'sub': current_user.email}),
+        'access_token': create_access_token(
+            data=token_claims(current_user.email, current_user.id, generation)
+        ),
         'token_type': 'bearer',
     }
@@ -0,0 +1,90 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from redis.exceptions import RedisError
+
+from app.cache import todo_page_cache
+from app.database import async_engine, pool_stats
+from app.metrics import (
+    TRASH_CLEANER_STATS_KEY,
+    Counter,
+    Gauge,
+    registry,
+    trash_cleaner_metrics,
+)
+from app.redis_client import redis_client
+from app.security import hash_executor
+
+router = APIRouter(tags=['metrics'])
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def pool_connections():
+    pool = async_engine.pool
+    return {
+        ('size',): pool.size(),
+        ('checked_out',): pool.checkedout(),
+        ('overflow',): pool.overflow(),
+    }
+
+
+registry.register(
+    Gauge(
+        'db_pool_connections',
+        'Database pool size, connections in use and overflow connections.',
+        ('state',),
+        callback=pool_connections,
+    )
+)
+registry.register(
+    Counter(
+        'db_pool_checkouts_total',
+        'Database connection checkouts.',
+        callback=lambda: pool_stats.checkouts,
+    )
+)
+registry.register(
+    Counter(
+        'db_pool_checkout_wait_seconds_total',
+        'Time spent waiting for a database connection.',
+        callback=lambda: pool_stats.wait_total,
+    )
+)
+registry.register(
+    Gauge(
+        'db_pool_checkout_wait_max_seconds',
+        'Longest wait for a database connection.',
+        callback=lambda: pool_stats.wait_max,
+    )
+)
+registry.register(
+    Gauge(
+        'password_hash_pending',
+        'Argon2 jobs running or waiting for a worker.',
+        callback=lambda: hash_executor.pending,
+    )
+)
+registry.register(
+    Counter(
+        'todo_page_cache_requests_total',
+        'Todo page cache lookups by result.',
+        ('result',),
+        callback=lambda: {
+            (result,): count
+            for result, count in todo_page_cache.stats.as_dict().items()
+        },
+    )
+)
+
+
+@router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    try:
+        trash_cleaner_stats = await redis_client.hgetall(TRASH_CLEANER_STATS_KEY)
+    except RedisError:
+        trash_cleaner_stats = {}
+
+    return PlainTextResponse(
+        registry.render(*trash_cleaner_metrics(trash_cleaner_stats)),
+        media_type=CONTENT_TYPE,
+    )
@@ -1,36 +1,146 @@
+import csv
+import io
+import json
+from collections import Counter
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import delete, select
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import todo_page_cache
+from app.changes import todo_changes
+from app.counters import add_todo_counts, count_new_todos, update_todos
 from app.database import get_session
-from app.dependencies import get_current_user, get_valid_todo
-from app.models import Todo, User
+from app.dependencies import CurrentPrincipal, update_valid_todo
+from app.importer import import_todos
+from app.models import Todo, TodoCount, TodoTombstone
+from app.pagination import next_cursor_headers, paginate
+from app.responses import dump_rows, rows_response, schema_columns
 from app.schemas import (
+    FileFormat,
+    Principal,
+    TodoBulkCreate,
+    TodoChanges,
+    TodoChangesQuery,
+    TodoCreate,
+    TodoExportQuery,
+    TodoFilter,
     TodoFilterQuery,
+    TodoImportQuery,
     TodoPublic,
-    TodoSchema,
+    TodoSelection,
+    TodoStats,
     TodoStatus,
     TodoStatusCreate,
     TodoStatusPublic,
     TodoUpdate,
 )
+from app.settings import get_settings
+from app.versioning import (
+    bump_todos_version,
+    etag_matches,
+    etag_version,
+    get_todos_version,
+    make_etag,
+)
 
 router = APIRouter(prefix='/todos', tags=['todos'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
-DbTodo = Annotated[Todo, Depends(get_valid_todo)]
 TodoFilterQuery = Annotated[TodoFilterQuery, Query()]
+TodoExportQuery = Annotated[TodoExportQuery, Query()]
+TodoChangesQuery = Annotated[TodoChangesQuery, Query()]
+TodoImportQuery = Annotated[TodoImportQuery, Query()]
+IfMatch = Annotated[str | None, Header()]
+IfNoneMatch = Annotated[str | None, Header()]
+settings = get_settings()
+
+
+def precondition_failed():
+    return HTTPException(
+        status_code=HTTPStatus.PRECONDITION_FAILED,
+        detail='Todos were modified by another request.',
+    )
+
+
+async def bump_version(
+    session: Session,
+    current_user: CurrentPrincipal,
+    response: Response,
+    if_match: IfMatch = None,
+):
+    expected = None
+
+    if if_match is not None and if_match.strip() != '*':
+        expected = etag_version(if_match)
+        if expected is None:
+            raise precondition_failed()
+
+    version = await bump_todos_version(session, current_user.id, expected)
+    if version is None:
+        raise precondition_failed()
+
+    response.headers['ETag'] = make_etag(version)
+
+
+BumpVersion = Depends(bump_version)
+
+
+def check_batch_size(size: int):
+    if not 0 < size <= settings.TODO_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f'Send between 1 and {settings.TODO_BULK_MAX_SIZE} todos.',
+        )
+
+
+def filter_params(todo_filter: TodoFilter):
+    params = []
+
+    for key, value in todo_filter.model_dump(
+        exclude_none=True, include=set(TodoFilter.model_fields)
+    ).items():
+        if key == 'title':
+            params.append(getattr(Todo, key).contains(value))
+        else:
+            params.append(getattr(Todo, key) == value)
+
+    return params
+
+
+def selection_params(current_user: Principal, selection: TodoSelection):
+    params = [Todo.user_id == current_user.id, Todo.status != TodoStatus.TRASH]
+
+    if selection.ids is not None:
+        check_batch_size(len(selection.ids))
+        params.append(Todo.id.in_(selection.ids))
+    else:
+        params.extend(filter_params(selection.filter))
 
+    return params
 
-@router.post('/', status_code=HTTPStatus.CREATED, response_model=TodoPublic)
+
+@router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    response_model=TodoPublic,
+    dependencies=[BumpVersion],
+)
 async def create_todo(
-    new_todo: TodoSchema,
+    new_todo: TodoCreate,
     session: Session,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     todo_status: TodoStatusCreate = TodoStatusPublic.DRAFT.value,
 ):
     db_todo = Todo(
@@ -40,94 +150,326 @@ async def create_todo(
         user_id=current_user.id,
     )
     session.add(db_todo)
+    await count_new_todos(session, current_user.id, [db_todo.status])
     await session.commit()
 
     return db_todo
 
 
+@router.post(
+    '/bulk',
+    status_code=HTTPStatus.CREATED,
+    response_model=list[TodoPublic],
+    dependencies=[BumpVersion],
+)
+async def create_todos_bulk(
+    new_todos: list[TodoBulkCreate],
+    session: Session,
+    current_user: CurrentPrincipal,
+):
+    check_batch_size(len(new_todos))
+
+    db_todos = await session.scalars(
+        insert(Todo).returning(Todo, sort_by_parameter_order=True),
+        [
+            {
+                'title': new_todo.title,
+                'description': new_todo.description,
+                'status': new_todo.status.value,
+                'user_id': current_user.id,
+            }
+            for new_todo in new_todos
+        ],
+    )
+    db_todos = db_todos.all()
+    await count_new_todos(
+        session, current_user.id, (db_todo.status for db_todo in db_todos)
+    )
+    await session.commit()
+
+    return db_todos
+
+
 @router.get('/', response_model=list[TodoPublic])
 async def get_todos(
     session: Session,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     todo_filter_query: TodoFilterQuery,
+    if_none_match: IfNoneMatch = None,
 ):
-    params = [Todo.user_id == current_user.id]
+    version = await get_todos_version(session, current_user.id)
+    etag = make_etag(version, 'todos', todo_filter_query.model_dump_json())
 
-    for key, value in todo_filter_query.model_dump(
-        exclude_none=True, exclude={'limit', 'offset'}
-    ).items():
-        if key == 'title':
-            params.append(getattr(Todo, key).contains(value))
-        else:
-            params.append(getattr(Todo, key) == value)
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag})
+
+    cached = await todo_page_cache.get(current_user.id, etag)
+    if cached is not None:
+        body, headers = cached
+        return Response(body, media_type='application/json', headers=headers)
+
+    params = [Todo.user_id == current_user.id, *filter_params(todo_filter_query)]
+    query = paginate(
+        select(*schema_columns(TodoPublic, Todo), Todo.created_at).where(*params),
+        Todo,
+        todo_filter_query.limit,
+        todo_filter_query.offset,
+        todo_filter_query.cursor,
+    )
+    rows = (await session.execute(query)).all()
+
+    headers = {'ETag': etag, **next_cursor_headers(rows, todo_filter_query.limit)}
+    body = dump_rows(rows, TodoPublic)
+    await todo_page_cache.set(current_user.id, etag, body.decode(), headers)
+
+    return Response(body, media_type='application/json', headers=headers)
 
-    return await session.scalars(
-        select(Todo)
+
+EXPORT_COLUMNS = ('id', 'title', 'description', 'status')
+EXPORT_MEDIA_TYPES = {
+    FileFormat.NDJSON: 'application/x-ndjson',
+    FileFormat.CSV: 'text/csv',
+}
+
+
+def encode_ndjson(rows):
+    return ''.join(
+        json.dumps({
+            'id': str(row.id),
+            'title': row.title,
+            'description': row.description,
+            'status': row.status.value,
+        })
+        + '\n'
+        for row in rows
+    )
+
+
+def encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        (str(row.id), row.title, row.description, row.status.value) for row in rows
+    )
+
+    return buffer.getvalue()
+
+
+async def stream_todos(session: Session, params: list, export_format: FileFormat):
+    result = await session.stream(
+        select(*(getattr(Todo, column) for column in EXPORT_COLUMNS))
         .where(*params)
-        .offset(todo_filter_query.offset)
-        .limit(todo_filter_query.limit)
+        .order_by(Todo.created_at, Todo.id)
+        .execution_options(yield_per=settings.TODO_EXPORT_CHUNK_SIZE)
+    )
+
+    if export_format == FileFormat.CSV:
+        encode = encode_csv
+        yield ','.join(EXPORT_COLUMNS) + '\r\n'
+    else:
+        encode = encode_ndjson
+
+    async for rows in result.partitions():
+        yield encode(rows)
+
+
+@router.get('/stats', response_model=TodoStats)
+async def get_todo_stats(session: Session, current_user: CurrentPrincipal):
+    counts = await session.execute(
+        select(TodoCount.status, TodoCount.count).where(
+            TodoCount.user_id == current_user.id
+        )
+    )
+
+    return {status.value.lower(): count for status, count in counts}
+
+
+@router.get('/changes', response_model=TodoChanges)
+async def get_todo_changes(
+    session: Session,
+    current_user: CurrentPrincipal,
+    todo_changes_query: TodoChangesQuery,
+):
+    return await todo_changes(
+        session,
+        current_user.id,
+        todo_changes_query.since,
+        todo_changes_query.limit,
+    )
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_todos(
+    session: Session,
+    current_user: CurrentPrincipal,
+    todo_export_query: TodoExportQuery,
+):
+    params = [Todo.user_id == current_user.id, *filter_params(todo_export_query)]
+    export_format = todo_export_query.format
+
+    return StreamingResponse(
+        stream_todos(session, params, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format.value}"'
+            )
+        },
+    )
+
+
+async def stream_import_progress(
+    session: Session,
+    current_user: Principal,
+    file: UploadFile,
+    file_format: FileFormat,
+):
+    async for progress in import_todos(
+        session, current_user.id, file.file, file_format
+    ):
+        yield json.dumps(progress) + '\n'
+
+
+@router.post('/import', response_class=StreamingResponse)
+async def import_todos_file(
+    file: UploadFile,
+    session: Session,
+    current_user: CurrentPrincipal,
+    todo_import_query: TodoImportQuery,
+):
+    return StreamingResponse(
+        stream_import_progress(session, current_user, file, todo_import_query.format),
+        media_type=EXPORT_MEDIA_TYPES[FileFormat.NDJSON],
     )
 
 
 @router.get('/trash', response_model=list[TodoPublic])
 async def get_deleted_todos(
     session: Session,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
+    if_none_match: IfNoneMatch = None,
 ):
-    return await session.scalars(
-        select(Todo).where(
+    version = await get_todos_version(session, current_user.id)
+    etag = make_etag(version, 'trash')
+
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag})
+
+    rows = await session.execute(
+        select(*schema_columns(TodoPublic, Todo)).where(
             Todo.user_id == current_user.id,
             Todo.status == TodoStatus.TRASH,
         )
     )
 
+    return rows_response(rows.all(), TodoPublic, headers={'ETag': etag})
+
 
-@router.delete('/trash', status_code=HTTPStatus.NO_CONTENT)
+@router.delete('/trash', status_code=HTTPStatus.NO_CONTENT, dependencies=[BumpVersion])
 async def empty_user_todo_trash(
     session: Session,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
 ):
-    await session.execute(
-        delete(Todo).where(
-            Todo.user_id == current_user.id,
-            Todo.status == TodoStatus.TRASH,
+    deleted = (
+        await session.execute(
+            delete(Todo)
+            .where(
+                Todo.user_id == current_user.id,
+                Todo.status == TodoStatus.TRASH,
+            )
+            .returning(Todo.id.label('todo_id'), Todo.user_id)
         )
+    ).all()
+    if deleted:
+        await session.execute(insert(TodoTombstone), [row._asdict() for row in deleted])
+    await add_todo_counts(
+        session, Counter({(current_user.id, TodoStatus.TRASH): -len(deleted)})
+    )
+    await session.commit()
+
+
+@router.patch('/status', response_model=list[TodoPublic], dependencies=[BumpVersion])
+async def update_todos_status(
+    status: TodoStatusPublic,
+    selection: TodoSelection,
+    session: Session,
+    current_user: CurrentPrincipal,
+):
+    db_todos = await update_todos(
+        session,
+        selection_params(current_user, selection),
+        {'status': TodoStatus(status.value)},
+    )
+    await session.commit()
+
+    return db_todos
+
+
+@router.delete('/', response_model=list[TodoPublic], dependencies=[BumpVersion])
+async def delete_todos(
+    selection: TodoSelection,
+    session: Session,
+    current_user: CurrentPrincipal,
+):
+    db_todos = await update_todos(
+        session, selection_params(current_user, selection), {'status': TodoStatus.TRASH}
     )
     await session.commit()
 
+    return db_todos
+
 
-@router.patch('/{todo_id_or_title}/status', response_model=TodoPublic)  # noqa: FAST003
+@router.patch(
+    '/{todo_id_or_title}/status',
+    response_model=TodoPublic,
+    dependencies=[BumpVersion],
+)
 async def update_todo_status(
+    todo_id_or_title: str,
     status: TodoStatusPublic,
-    db_todo: DbTodo,
     session: Session,
+    current_user: CurrentPrincipal,
 ):
-    db_todo.status = TodoStatus(status.value)
+    db_todo = await update_valid_todo(
+        session, current_user, todo_id_or_title, {'status': TodoStatus(status.value)}
+    )
     await session.commit()
-    await session.refresh(db_todo)
 
     return db_todo
 
 
-@router.patch('/{todo_id_or_title}', response_model=TodoPublic)  # noqa: FAST003
+@router.patch(
+    '/{todo_id_or_title}',
+    response_model=TodoPublic,
+    dependencies=[BumpVersion],
+)
 async def update_todo_data(
+    todo_id_or_title: str,
     new_todo_data: TodoUpdate,
-    db_todo: DbTodo,
     session: Session,
+    current_user: CurrentPrincipal,
 ):
-    for key, value in new_todo_data.model_dump(exclude_none=True).items():
-        setattr(db_todo, key, value)
-
+    db_todo = await update_valid_todo(
+        session,
+        current_user,
+        todo_id_or_title,
+        new_todo_data.model_dump(exclude_none=True),
+    )
     await session.commit()
-    await session.refresh(db_todo)
 
     return db_todo
 
 
-@router.delete('/{todo_id_or_title}', status_code=HTTPStatus.NO_CONTENT)  # noqa: FAST003
+@router.delete(
+    '/{todo_id_or_title}',
+    status_code=HTTPStatus.NO_CONTENT,
+    dependencies=[BumpVersion],
+)
 async def delete_todo(
-    db_todo: DbTodo,
+    todo_id_or_title: str,
     session: Session,
+    current_user: CurrentPrincipal,
 ):
-    db_todo.status = TodoStatus.TRASH
+    await update_valid_todo(
+        session, current_user, todo_id_or_title, {'status': TodoStatus.TRASH}
+    )
     await session.commit()
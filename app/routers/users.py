@@ -1,22 +1,33 @@
+import logging
 import uuid
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from kombu.exceptions import OperationalError
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import principal_cache, token_generation_cache
 from app.database import get_session
 from app.dependencies import get_current_user
-from app.models import User
-from app.schemas import UserPublic, UserSchema, UserUpdate
+from app.models import Todo, User
+from app.pagination import next_cursor_headers, paginate
+from app.responses import dump_ndjson, rows_response, schema_columns
+from app.schemas import UserListQuery, UserPublic, UserSchema, UserUpdate
 from app.security import get_password_hash
+from app.settings import get_settings
+from app.tasks.cleanup_tasks import purge_user
 
 router = APIRouter(prefix='/users', tags=['users'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[UserPublic, Depends(get_current_user)]
+UserListQuery = Annotated[UserListQuery, Query()]
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
@@ -24,7 +35,7 @@ async def create_user(new_user: UserSchema, session: Session):
     db_user = User(
         username=new_user.username,
         email=new_user.email,
-        password=get_password_hash(new_user.password),
+        password=await get_password_hash(new_user.password),
     )
 
     try:
@@ -39,9 +50,43 @@ async def create_user(new_user: UserSchema, session: Session):
         )
 
 
-@router.get('/', response_model=list[UserPublic])
-async def get_users(session: Session):
-    return await session.scalars(select(User))
+async def stream_users(session: Session):
+    result = await session.stream(
+        select(*schema_columns(UserPublic, User))
+        .where(User.disabled.is_(False))
+        .order_by(User.created_at, User.id)
+        .execution_options(yield_per=settings.USER_STREAM_CHUNK_SIZE)
+    )
+
+    async for rows in result.partitions():
+        yield dump_ndjson(rows, UserPublic)
+
+
+@router.get(
+    '/',
+    response_model=list[UserPublic],
+    responses={HTTPStatus.OK: {'content': {'application/x-ndjson': {}}}},
+)
+async def get_users(session: Session, user_list_query: UserListQuery):
+    if user_list_query.stream:
+        return StreamingResponse(
+            stream_users(session), media_type='application/x-ndjson'
+        )
+
+    query = paginate(
+        select(*schema_columns(UserPublic, User), User.created_at).where(
+            User.disabled.is_(False)
+        ),
+        User,
+        user_list_query.limit,
+        user_list_query.offset,
+        user_list_query.cursor,
+    )
+    rows = (await session.execute(query)).all()
+
+    return rows_response(
+        rows, UserPublic, headers=next_cursor_headers(rows, user_list_query.limit)
+    )
 
 
 @router.get('/me', response_model=UserPublic)
@@ -51,7 +96,9 @@ async def get_me(current_user: CurrentUser):
 
 @router.get('/{user_id}', response_model=UserPublic)
 async def get_user_by_id(user_id: uuid.UUID, session: Session):
-    db_user = await session.scalar(select(User).where(User.id == user_id))
+    db_user = await session.scalar(
+        select(User).where(User.id == user_id, User.disabled.is_(False))
+    )
 
     if not db_user:
         raise HTTPException(
@@ -61,51 +108,100 @@ async def get_user_by_id(user_id: uuid.UUID, session: Session):
     return db_user
 
 
+async def apply_user_changes(session: Session, user_id: uuid.UUID, changes: dict):
+    """Update the user in one UPDATE ... RETURNING and return it, or None.
+
+    Databases without UPDATE ... RETURNING read the row back afterwards.
+    """
+    query = update(User).where(User.id == user_id).values(changes)
+
+    if session.get_bind().dialect.update_returning:
+        return await session.scalar(query.returning(User))
+
+    await session.execute(query)
+    return await session.get(User, user_id, populate_existing=True)
+
+
 @router.patch('/{user_id}', response_model=UserPublic)
 async def update_user(
     user_id: uuid.UUID, user: UserUpdate, session: Session, current_user: CurrentUser
 ):
-    db_user = await session.scalar(
-        select(User).where(
-            User.id == user_id,
-            User.id == current_user.id,
-        )
-    )
-
-    if not db_user:
+    if user_id != current_user.id:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='User does not exist.'
         )
 
-    try:
-        for key, value in user.model_dump(exclude_unset=True).items():
-            if key == 'password':
-                setattr(db_user, key, get_password_hash(value))
+    changes = user.model_dump(exclude_unset=True)
+    if 'password' in changes:
+        changes['password'] = await get_password_hash(changes['password'])
 
-            else:
-                setattr(db_user, key, value)
+    if changes.keys() & {'email', 'password'}:
+        # Tokens carry the email as subject, so either change revokes them.
+        changes['token_generation'] = User.token_generation + 1
 
+    try:
+        db_user = await apply_user_changes(session, user_id, changes)
         await session.commit()
-        await session.refresh(db_user)
-
-        return db_user
 
     except IntegrityError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT, detail='User already exists.'
         )
 
+    if not db_user:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='User does not exist.'
+        )
+
+    await principal_cache.invalidate(current_user.email)
+    await token_generation_cache.invalidate(str(user_id))
+
+    return db_user
 
-@router.delete('/{user_id}', status_code=HTTPStatus.NO_CONTENT)
+
+@router.delete(
+    '/{user_id}',
+    status_code=HTTPStatus.NO_CONTENT,
+    responses={
+        HTTPStatus.ACCEPTED: {
+            'description': 'Account disabled, its todos are purged in the background.'
+        }
+    },
+)
 async def delete_user(user_id: uuid.UUID, session: Session, current_user: CurrentUser):
     if user_id != current_user.id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Not allowed.')
 
-    db_user = await session.scalar(
-        select(User).where(
-            User.id == user_id,
-        )
+    # Past USER_PURGE_THRESHOLD todos the cascade could outlast the request.
+    large = await session.scalar(
+        select(Todo.id)
+        .where(Todo.user_id == user_id)
+        .offset(settings.USER_PURGE_THRESHOLD)
+        .limit(1)
     )
 
-    await session.delete(db_user)
+    if large is None:
+        await session.execute(delete(User).where(User.id == user_id))
+    else:
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                disabled=True,
+                disabled_at=func.now(),
+                token_generation=User.token_generation + 1,
+            )
+        )
+
     await session.commit()
+    await principal_cache.invalidate(current_user.email)
+    await token_generation_cache.invalidate(str(user_id))
+
+    if large is not None:
+        try:
+            purge_user.delay(str(user_id))
+        except OperationalError:
+            # The account stays disabled, purge_disabled_users queues it later.
+            logger.warning('Could not queue purge_user %s', user_id, exc_info=True)
+
+        return Response(status_code=HTTPStatus.ACCEPTED)
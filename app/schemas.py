@@ -1,7 +1,17 @@
 import enum
 import uuid
+from typing import Annotated
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    EmailStr,
+    Field,
+    field_validator,
+    model_validator,
+)
+
+from app.pagination import decode_cursor
 
 
 class UserSchema(BaseModel):
@@ -16,6 +26,11 @@ class UserPublic(BaseModel):
     email: EmailStr
 
 
+class Principal(BaseModel):
+    id: uuid.UUID
+    email: EmailStr
+
+
 class UserUpdate(BaseModel):
     username: str | None = None
     email: EmailStr | None = None
@@ -43,27 +58,128 @@ class TodoStatusCreate(str, enum.Enum):
     PENDING = 'PENDING'
 
 
+class FileFormat(str, enum.Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+# Literal paths under /todos. A todo with one of these titles could not be
+# reached by title, e.g. PATCH /todos/status is the bulk status change.
+RESERVED_TODO_TITLES = frozenset({
+    'bulk',
+    'changes',
+    'export',
+    'import',
+    'stats',
+    'status',
+    'trash',
+})
+
+
+def validate_todo_title(title: str):
+    if title in RESERVED_TODO_TITLES:
+        raise ValueError(f'{title!r} is a reserved title.')
+
+    return title
+
+
+TodoTitle = Annotated[str, AfterValidator(validate_todo_title)]
+
+
 class TodoSchema(BaseModel):
     title: str
     description: str
 
 
+class TodoCreate(TodoSchema):
+    title: TodoTitle
+
+
+class TodoBulkCreate(TodoCreate):
+    status: TodoStatusCreate = TodoStatusCreate.DRAFT
+
+
 class TodoPublic(TodoSchema):
     id: uuid.UUID
     status: TodoStatus
 
 
+class TodoStats(BaseModel):
+    draft: int = 0
+    active: int = 0
+    pending: int = 0
+    completed: int = 0
+    trash: int = 0
+
+
+class TodoChanges(BaseModel):
+    todos: list[TodoPublic]
+    deleted: list[uuid.UUID]
+    watermark: str
+    has_more: bool
+
+
 class TodoUpdate(BaseModel):
-    title: str | None = None
+    title: TodoTitle | None = None
     description: str | None = None
 
 
 class FilterParams(BaseModel):
     limit: int = Field(100, gt=0, le=100)
     offset: int = Field(0, ge=0)
+    cursor: str | None = None
+
+    @field_validator('cursor')
+    @classmethod
+    def validate_cursor(cls, value: str | None):
+        if value is not None:
+            decode_cursor(value)
+
+        return value
+
+
+class UserListQuery(FilterParams):
+    stream: bool = False
 
 
-class TodoFilterQuery(FilterParams):
+class TodoFilter(BaseModel):
     title: str | None = Field(None, min_length=3, max_length=20)
     description: str | None = Field(None, max_length=20)
     status: TodoStatusPublic | None = None
+
+
+class TodoFilterQuery(FilterParams, TodoFilter):
+    pass
+
+
+class TodoChangesQuery(BaseModel):
+    since: str | None = None
+    limit: int = Field(100, gt=0, le=100)
+
+    @field_validator('since')
+    @classmethod
+    def validate_since(cls, value: str | None):
+        if value is not None:
+            decode_cursor(value)
+
+        return value
+
+
+class TodoExportQuery(TodoFilter):
+    format: FileFormat = FileFormat.NDJSON
+
+
+class TodoImportQuery(BaseModel):
+    format: FileFormat = FileFormat.NDJSON
+
+
+class TodoSelection(BaseModel):
+    ids: list[uuid.UUID] | None = Field(None, min_length=1)
+    filter: TodoFilter | None = None
+
+    @model_validator(mode='after')
+    def validate_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Provide either ids or filter.')
+
+        return self
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from typing import Annotated
@@ -11,6 +15,7 @@ from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_session
+from app.metrics import password_hash_duration
 from app.models import User
 from app.settings import get_settings
 
@@ -23,27 +28,75 @@ settings = get_settings()
 DUMMY_HASH = hasher.hash('dummypassword')
 
 
-def get_password_hash(password: str):
-    return hasher.hash(password)
+class HashExecutor:
+    """Runs argon2 on a bounded thread pool instead of the event loop.
 
+    Calls beyond ``max_pending`` queued or running jobs are rejected with 503
+    so a login storm cannot build an unbounded backlog. A job only leaves
+    ``pending`` once it finishes, even if the request that started it went
+    away.
+    """
 
-def verify_password(plain_password, hashed_password):
-    return hasher.verify(plain_password, hashed_password)
+    def __init__(self, max_workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='argon2'
+        )
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def job_done(self, future: Future):
+        with self.lock:
+            self.pending -= 1
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Server is busy, try again later.',
+                headers={'Retry-After': '1'},
+            )
+
+        with self.lock:
+            self.pending += 1
+
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self.job_done)
+
+        with password_hash_duration.time(func.__name__):
+            return await asyncio.wrap_future(future)
+
+
+hash_executor = HashExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def get_password_hash(password: str):
+    return await hash_executor.run(hasher.hash, password)
+
+
+async def verify_password(plain_password, hashed_password):
+    return await hash_executor.run(hasher.verify, plain_password, hashed_password)
 
 
 async def authenticate_user(username: str, password: str, session: Session):
     db_user = await session.scalar(
-        select(User).where(or_(User.email == username, User.username == username))
+        select(User).where(
+            or_(User.email == username, User.username == username),
+            User.disabled.is_(False),
+        )
     )
 
     if not db_user:
-        verify_password(password, DUMMY_HASH)
+        await verify_password(password, DUMMY_HASH)
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Invalid username or password.',
         )
 
-    if not verify_password(password, db_user.password):
+    if not await verify_password(password, db_user.password):
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED, detail='Invalid username or password.'
         )
@@ -51,6 +104,14 @@ async def authenticate_user(username: str, password: str, session: Session):
     return db_user
 
 
+def token_claims(email: str, user_id: uuid.UUID, generation: int | None = None):
+    """Claims of an access token, stateless when ``generation`` is given."""
+    if generation is None:
+        return {'sub': email}
+
+    return {'sub': email, 'uid': str(user_id), 'gen': generation}
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
 
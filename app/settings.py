@@ -11,6 +11,18 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_PASSWORD: str
 
+    DB_POOL_SIZE: int = Field(default=5, gt=0)
+    DB_MAX_OVERFLOW: int = Field(default=10, ge=0)
+    DB_POOL_TIMEOUT: float = Field(default=30, gt=0)
+    DB_POOL_RECYCLE: int = Field(default=1800, ge=-1)
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SLOW_CHECKOUT: float = Field(default=0.5, ge=0)
+    DB_PREPARE_THRESHOLD: int | None = 5
+    DB_PGBOUNCER: bool = False
+    DB_SLOW_QUERY_THRESHOLD: float = Field(default=0.5, ge=0)
+
+    DEBUG: bool = False
+
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30, gt=0)
     SECRET_KEY: str
     ALGORITHM: str
@@ -23,10 +35,44 @@ class Settings(BaseSettings):
 
     TODO_TRASH_EXPIRE_DAYS: int
     TODO_TRASH_CLEANUP_INTERVAL_DAYS: int
+    TODO_TRASH_CLEANUP_BATCH_SIZE: int = Field(default=1000, gt=0)
+    TODO_TRASH_CLEANUP_BATCH_PAUSE: float = Field(default=0.1, ge=0)
+    TODO_BULK_MAX_SIZE: int = Field(default=1000, gt=0)
+    TODO_EXPORT_CHUNK_SIZE: int = Field(default=1000, gt=0)
+    TODO_IMPORT_CHUNK_SIZE: int = Field(default=5000, gt=0)
+    TODO_COUNTS_RECONCILE_BATCH_SIZE: int = Field(default=1000, gt=0)
+    TODO_TOMBSTONE_EXPIRE_DAYS: int = Field(default=30, gt=0)
+    TODO_CHANGES_SAFETY_WINDOW: float = Field(default=5, ge=0)
+
+    USER_STREAM_CHUNK_SIZE: int = Field(default=1000, gt=0)
+    USER_PURGE_THRESHOLD: int = Field(default=10_000, ge=0)
+    USER_PURGE_BATCH_SIZE: int = Field(default=1000, gt=0)
+    USER_PURGE_BATCH_PAUSE: float = Field(default=0.1, ge=0)
+    USER_PURGE_RETRY_AFTER: int = Field(default=3600, gt=0)
 
     LOGIN_ATTEMPTS_LIMIT: int
     LOGIN_LOCKOUT_TIME: int
 
+    REDIS_URL: str = 'redis://redis:6379/0'
+    REDIS_MAX_CONNECTIONS: int = Field(default=50, gt=0)
+    REDIS_SOCKET_TIMEOUT: float = Field(default=5, gt=0)
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(default=30, ge=0)
+
+    PRINCIPAL_CACHE_TTL: int = Field(default=60, ge=0)
+    PRINCIPAL_CACHE_MAXSIZE: int = Field(default=10_000, gt=0)
+    PRINCIPAL_CACHE_REDIS: bool = False
+
+    STATELESS_ACCESS_TOKENS: bool = False
+    TOKEN_GENERATION_CACHE_TTL: int = Field(default=60, ge=0)
+
+    TODO_LIST_CACHE: bool = False
+    TODO_LIST_CACHE_TTL: int = Field(default=30, gt=0)
+
+    METRICS_ENABLED: bool = True
+
+    PASSWORD_HASH_WORKERS: int = Field(default=4, gt=0)
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64, gt=0)
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -26,7 +26,19 @@ celery_app.conf.update(
                 minute=0,
                 day_of_month=f'*/{settings.TODO_TRASH_CLEANUP_INTERVAL_DAYS}',
             ),
-        }
+        },
+        'reconcile_todo_counts': {
+            'task': 'app.tasks.cleanup_tasks.reconcile_todo_counts',
+            'schedule': crontab(hour=1, minute=0),
+        },
+        'purge_disabled_users': {
+            'task': 'app.tasks.cleanup_tasks.purge_disabled_users',
+            'schedule': crontab(minute=30),
+        },
+        'tombstone_cleaner': {
+            'task': 'app.tasks.cleanup_tasks.tombstone_cleaner',
+            'schedule': crontab(hour=2, minute=0),
+        },
     },
 )
 
@@ -1,25 +1,287 @@
+import logging
+import time
+import uuid
+from collections import Counter
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import delete
+from redis.exceptions import RedisError
+from sqlalchemy import delete, func, insert, select, update
 
+from app.counters import upsert_todo_counts
 from app.database import sync_session_factory
-from app.models import Todo, TodoStatus
+from app.metrics import record_trash_cleaner_run
+from app.models import Todo, TodoCount, TodoStatus, TodoTombstone, User
+from app.redis_client import sync_redis_client
 from app.settings import get_settings
 from app.tasks.celery_app import celery_app
+from app.versioning import todos_version_bump
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
 @celery_app.task(ignore_result=True)
 def trash_cleaner():
+    """Delete expired trash in committed batches.
+
+    Every batch commits on its own, so a redelivered task (``task_acks_late``)
+    simply carries on with whatever expired rows are left. The todos version,
+    trash count and tombstones of every affected user are written in the
+    same transaction. Like the API, a batch locks its users, in id order,
+    before their todos and todo counts.
+    """
     time_diff = datetime.now(UTC).replace(tzinfo=None) - timedelta(
         days=settings.TODO_TRASH_EXPIRE_DAYS
     )
+    batch_size = settings.TODO_TRASH_CLEANUP_BATCH_SIZE
+    stats = {'deleted': 0, 'batches': 0}
+    start = time.perf_counter()
+
+    expired = (Todo.status == TodoStatus.TRASH, Todo.updated_at <= time_diff)
+    expired_users = (
+        select(Todo.user_id).where(*expired).order_by(Todo.updated_at).limit(batch_size)
+    )
+
+    with sync_session_factory() as session:
+        while True:
+            user_ids = sorted(set(session.scalars(expired_users).all()))
+            rows = []
+
+            if user_ids:
+                session.execute(
+                    select(User.id)
+                    .where(User.id.in_(user_ids))
+                    .order_by(User.id)
+                    .with_for_update()
+                )
+                session.execute(
+                    update(User)
+                    .where(User.id.in_(user_ids))
+                    .values(todos_version_bump())
+                )
+                expired_batch = (
+                    select(Todo.id)
+                    .where(*expired, Todo.user_id.in_(user_ids))
+                    .order_by(Todo.updated_at)
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                rows = session.execute(
+                    delete(Todo)
+                    .where(Todo.id.in_(expired_batch.scalar_subquery()))
+                    .returning(Todo.id.label('todo_id'), Todo.user_id)
+                ).all()
+
+            if rows:
+                session.execute(insert(TodoTombstone), [row._asdict() for row in rows])
+                session.execute(
+                    upsert_todo_counts(
+                        session.get_bind().dialect,
+                        Counter({
+                            (user_id, TodoStatus.TRASH): -count
+                            for user_id, count in Counter(
+                                row.user_id for row in rows
+                            ).items()
+                        }),
+                    )
+                )
+            session.commit()
+            deleted = len(rows)
+
+            stats['deleted'] += deleted
+            stats['batches'] += 1
+
+            if deleted < batch_size:
+                break
+
+            time.sleep(settings.TODO_TRASH_CLEANUP_BATCH_PAUSE)
+
+    stats['duration'] = round(time.perf_counter() - start, 3)
+    logger.info(
+        'trash_cleaner deleted %(deleted)s todos in %(batches)s batches '
+        'in %(duration)ss',
+        stats,
+    )
+
+    try:
+        record_trash_cleaner_run(sync_redis_client, stats)
+    except RedisError:
+        logger.warning('Could not record trash_cleaner stats', exc_info=True)
+
+    return stats
+
+
+@celery_app.task(ignore_result=True)
+def tombstone_cleaner():
+    """Delete tombstones older than ``TODO_TOMBSTONE_EXPIRE_DAYS``.
+
+    ``GET /todos/changes`` refuses watermarks that old, so no client can
+    still need them. Runs in committed batches like ``trash_cleaner``.
+    """
+    time_diff = datetime.now(UTC).replace(tzinfo=None) - timedelta(
+        days=settings.TODO_TOMBSTONE_EXPIRE_DAYS
+    )
+    batch_size = settings.TODO_TRASH_CLEANUP_BATCH_SIZE
+    deleted = 0
+
+    expired_batch = (
+        select(TodoTombstone.todo_id)
+        .where(TodoTombstone.deleted_at <= time_diff)
+        .limit(batch_size)
+    )
+
+    with sync_session_factory() as session:
+        while True:
+            result = session.execute(
+                delete(TodoTombstone).where(
+                    TodoTombstone.todo_id.in_(expired_batch.scalar_subquery())
+                )
+            )
+            session.commit()
+            deleted += result.rowcount
+
+            if result.rowcount < batch_size:
+                break
+
+            time.sleep(settings.TODO_TRASH_CLEANUP_BATCH_PAUSE)
+
+    logger.info('tombstone_cleaner deleted %s tombstones', deleted)
+
+    return deleted
+
+
+@celery_app.task(ignore_result=True)
+def purge_user(user_id: str):
+    """Delete a disabled user's todos in committed batches, then the user.
+
+    ``delete_user`` hands off accounts too large to delete in one request.
+    Like ``trash_cleaner``, a redelivered task carries on with the todos
+    that are left.
+    """
+    user_id = uuid.UUID(user_id)
+    batch_size = settings.USER_PURGE_BATCH_SIZE
+    stats = {'deleted': 0, 'batches': 0}
+    start = time.perf_counter()
+
+    user_batch = select(Todo.id).where(Todo.user_id == user_id).limit(batch_size)
 
     with sync_session_factory() as session:
-        session.execute(
-            delete(Todo).where(
-                Todo.status == TodoStatus.TRASH, Todo.updated_at <= time_diff
+        if not session.scalar(select(User.disabled).where(User.id == user_id)):
+            logger.warning('purge_user skipped %s: no disabled user', user_id)
+            return stats
+
+        while True:
+            deleted = len(
+                session.scalars(
+                    delete(Todo)
+                    .where(Todo.id.in_(user_batch.scalar_subquery()))
+                    .returning(Todo.id)
+                ).all()
             )
-        )
+            session.commit()
+
+            stats['deleted'] += deleted
+            stats['batches'] += 1
+
+            if deleted < batch_size:
+                break
+
+            time.sleep(settings.USER_PURGE_BATCH_PAUSE)
+
+        session.execute(delete(User).where(User.id == user_id))
         session.commit()
+
+    stats['duration'] = round(time.perf_counter() - start, 3)
+    logger.info(
+        'purge_user deleted %(deleted)s todos in %(batches)s batches in %(duration)ss',
+        stats,
+    )
+
+    return stats
+
+
+@celery_app.task(ignore_result=True)
+def purge_disabled_users():
+    """Queue ``purge_user`` again for accounts left disabled.
+
+    ``delete_user`` commits the disabled account before queueing its purge,
+    so a failed enqueue or a lost task would leave it behind. Accounts
+    disabled for less than ``USER_PURGE_RETRY_AFTER`` seconds are skipped,
+    their first purge may still be running.
+    """
+    time_diff = datetime.now(UTC).replace(tzinfo=None) - timedelta(
+        seconds=settings.USER_PURGE_RETRY_AFTER
+    )
+
+    with sync_session_factory() as session:
+        user_ids = session.scalars(
+            select(User.id).where(
+                User.disabled.is_(True), User.disabled_at <= time_diff
+            )
+        ).all()
+
+    for user_id in user_ids:
+        purge_user.delay(str(user_id))
+
+    if user_ids:
+        logger.warning('purge_disabled_users queued %s users', len(user_ids))
+
+    return len(user_ids)
+
+
+@celery_app.task(ignore_result=True)
+def reconcile_todo_counts():
+    """Repair drift between ``todo_counts`` and the todos they count.
+
+    Users are walked in batches. The counters of a batch are locked before
+    its todos are counted, so writers wait and then apply their deltas on
+    top of the repaired values.
+    """
+    batch_size = settings.TODO_COUNTS_RECONCILE_BATCH_SIZE
+    stats = {'users': 0, 'repaired': 0}
+    last_user_id = None
+
+    with sync_session_factory() as session:
+        while True:
+            users = select(User.id).order_by(User.id).limit(batch_size)
+            if last_user_id is not None:
+                users = users.where(User.id > last_user_id)
+
+            user_ids = session.scalars(users).all()
+            if not user_ids:
+                break
+
+            stored = session.execute(
+                select(TodoCount.user_id, TodoCount.status, TodoCount.count)
+                .where(TodoCount.user_id.in_(user_ids))
+                .with_for_update()
+            ).all()
+            actual = session.execute(
+                select(Todo.user_id, Todo.status, func.count())
+                .where(Todo.user_id.in_(user_ids))
+                .group_by(Todo.user_id, Todo.status)
+            ).all()
+
+            drift = Counter({
+                (user_id, status): count for user_id, status, count in actual
+            })
+            drift.subtract({
+                (user_id, status): count for user_id, status, count in stored
+            })
+            drift = Counter({key: delta for key, delta in drift.items() if delta})
+
+            if drift:
+                logger.warning('Repairing %s drifted todo counts', len(drift))
+                session.execute(upsert_todo_counts(session.get_bind().dialect, drift))
+            session.commit()
+
+            stats['users'] += len(user_ids)
+            stats['repaired'] += len(drift)
+            last_user_id = user_ids[-1]
+
+    logger.info(
+        'reconcile_todo_counts checked %(users)s users, repaired %(repaired)s counts',
+        stats,
+    )
+
+    return stats
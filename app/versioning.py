@@ -0,0 +1,65 @@
+import hashlib
+import uuid
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+
+
+def make_etag(version: int, *variant: str):
+    """Build an ETag for a user's todos at ``version``.
+
+    ``variant`` distinguishes representations of the same version, e.g. the
+    filters of a list request.
+    """
+    if not variant:
+        return f'"{version}"'
+
+    digest = hashlib.blake2b('\n'.join(variant).encode(), digest_size=8).hexdigest()
+    return f'"{version}.{digest}"'
+
+
+def etag_version(etag: str):
+    try:
+        return int(etag.strip().removeprefix('W/').strip('"').split('.')[0])
+    except ValueError:
+        return None
+
+
+def etag_matches(header: str, etag: str):
+    return any(
+        candidate.strip().removeprefix('W/') in {'*', etag}
+        for candidate in header.split(',')
+    )
+
+
+async def get_todos_version(session: AsyncSession, user_id: uuid.UUID):
+    return await session.scalar(select(User.todos_version).where(User.id == user_id))
+
+
+def todos_version_bump():
+    """Values incrementing the todos version.
+
+    ``updated_at`` is kept as is: it tracks changes to the profile, not to
+    the user's todos.
+    """
+    return {'todos_version': User.todos_version + 1, 'updated_at': User.updated_at}
+
+
+async def bump_todos_version(
+    session: AsyncSession, user_id: uuid.UUID, expected: int | None = None
+):
+    """Increment the user's todos version in the current transaction.
+
+    With ``expected`` the increment only happens if the stored version still
+    matches, and None is returned otherwise.
+    """
+    query = update(User).where(User.id == user_id)
+
+    if expected is not None:
+        query = query.where(User.todos_version == expected)
+
+    return await session.scalar(
+        query.values(todos_version_bump()).returning(User.todos_version)
+    )
@@ -0,0 +1,63 @@
+"""Bulk create benchmark.
+
+Creates the same number of todos through ``POST /todos/`` one at a time and
+through ``POST /todos/bulk`` in batches, and prints todos/sec for both::
+
+    python -m benchmarks.bulk_create --todos 2000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import bench_client, create_user_and_login
+
+
+def todo_payload(index: int):
+    return {'title': f'todo {index}', 'description': 'benchmark'}
+
+
+async def run(todos: int, batch_size: int):
+    async with bench_client() as client:
+        headers = await create_user_and_login(client)
+
+        start = time.perf_counter()
+        for index in range(todos):
+            await client.post(
+                '/todos/?todo_status=ACTIVE', json=todo_payload(index), headers=headers
+            )
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for offset in range(0, todos, batch_size):
+            await client.post(
+                '/todos/bulk',
+                json=[
+                    {**todo_payload(index), 'status': 'ACTIVE'}
+                    for index in range(offset, min(offset + batch_size, todos))
+                ],
+                headers=headers,
+            )
+        bulk_elapsed = time.perf_counter() - start
+
+    return {
+        'todos': todos,
+        'batch_size': batch_size,
+        'single_todos_per_s': round(todos / single_elapsed, 1),
+        'bulk_todos_per_s': round(todos / bulk_elapsed, 1),
+        'speedup': round(single_elapsed / bulk_elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--todos', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.todos, args.batch_size)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Shared setup for the benchmark scripts.
+
+Importing this module before ``app`` points the app at a throwaway SQLite
+database unless ``DATABASE_URL`` is already set, and lifts the login rate
+limit so benchmarks are not throttled. Redis is faked unless ``REDIS_URL``
+is set.
+"""
+
+import logging
+import os
+import statistics
+import tempfile
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+
+os.environ.setdefault(
+    'DATABASE_URL',
+    f'sqlite+aiosqlite:///{tempfile.gettempdir()}/benchmarks.db',
+)
+os.environ.setdefault('LOGIN_ATTEMPTS_LIMIT', str(10**9))
+
+import fakeredis  # noqa: E402
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import async_engine, async_session_factory  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Todo, TodoCount, TodoStatus, User, table_registry  # noqa: E402
+from app.rate_limit import login_limiter  # noqa: E402
+from app.routers import metrics  # noqa: E402
+from app.security import create_access_token, hasher  # noqa: E402
+
+USER = {'username': 'bench', 'email': 'bench@example.com', 'password': 'secret'}
+
+
+def percentiles(samples: list[float]):
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+    }
+
+
+@asynccontextmanager
+async def bench_client():
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    if 'REDIS_URL' not in os.environ:
+        login_limiter.redis = fakeredis.aioredis.FakeRedis()
+        metrics.redis_client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://bench'
+    ) as client:
+        yield client
+
+    await async_engine.dispose()
+
+
+async def create_user_and_login(client: httpx.AsyncClient, user: dict = USER):
+    await client.post('/users/', json=user)
+    response = await client.post(
+        '/auth/token',
+        data={'username': user['username'], 'password': user['password']},
+    )
+
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+async def seed_accounts(users: int, todos_per_user: int, chunk_size: int = 5000):
+    """Insert users with todos straight into the database.
+
+    Every user shares one password hash and gets a token minted directly, so
+    seeding costs a single argon2 hash. One todo in ten is in the trash, the
+    ids of the others are listed in ``todo_ids``. The ``todo_counts`` of the
+    seeded todos are written alongside.
+    """
+    password = hasher.hash(USER['password'])
+    accounts = []
+    todos = []
+
+    for index in range(users):
+        account = {
+            'id': uuid.uuid4(),
+            'username': f'user{index}',
+            'email': f'user{index}@example.com',
+        }
+        account_todos = [
+            {
+                'id': uuid.uuid4(),
+                'user_id': account['id'],
+                'title': f'todo {todo_index}',
+                'description': 'benchmark',
+                'status': (
+                    TodoStatus.TRASH if todo_index % 10 == 0 else TodoStatus.ACTIVE
+                ),
+            }
+            for todo_index in range(todos_per_user)
+        ]
+        account['todo_ids'] = [
+            todo['id'] for todo in account_todos if todo['status'] == TodoStatus.ACTIVE
+        ]
+        accounts.append(account)
+        todos.extend(account_todos)
+
+    async with async_session_factory() as session:
+        await session.execute(
+            insert(User),
+            [
+                {
+                    'id': account['id'],
+                    'username': account['username'],
+                    'email': account['email'],
+                    'password': password,
+                }
+                for account in accounts
+            ],
+        )
+        for offset in range(0, len(todos), chunk_size):
+            await session.execute(insert(Todo), todos[offset : offset + chunk_size])
+        await session.execute(
+            insert(TodoCount),
+            [
+                {'user_id': user_id, 'status': status, 'count': count}
+                for (user_id, status), count in Counter(
+                    (todo['user_id'], todo['status']) for todo in todos
+                ).items()
+            ],
+        )
+        await session.commit()
+
+    for account in accounts:
+        token = create_access_token(data={'sub': account['email']})
+        account['headers'] = {'Authorization': f'Bearer {token}'}
+
+    return accounts
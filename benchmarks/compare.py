@@ -0,0 +1,68 @@
+"""Compare two route benchmark reports.
+
+Prints the relative change of p50, p95, p99 and requests/sec per scenario as
+JSON, and exits with status 1 when a percentile got slower, or the
+throughput dropped, by more than ``--threshold``::
+
+    python -m benchmarks.compare before.json after.json --threshold 0.2
+"""
+
+import argparse
+import json
+import sys
+
+LATENCIES = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def change(before: float, after: float):
+    return round((after - before) / before, 3) if before else None
+
+
+def compare(before: dict, after: dict, threshold: float):
+    changes = {}
+    regressions = []
+
+    for name, result in after['scenarios'].items():
+        baseline = before['scenarios'].get(name)
+        if baseline is None:
+            continue
+
+        changes[name] = {
+            key: change(baseline[key], result[key]) for key in (*LATENCIES, 'rps')
+        }
+
+        slower = (
+            any((changes[name][key] or 0) > threshold for key in LATENCIES)
+            or (changes[name]['rps'] or 0) < -threshold
+        )
+        if slower:
+            regressions.append(name)
+
+    return {
+        'before': before['commit'],
+        'after': after['commit'],
+        'changes': changes,
+        'regressions': regressions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with open(args.before, encoding='utf-8') as file:
+        before = json.load(file)
+    with open(args.after, encoding='utf-8') as file:
+        after = json.load(file)
+
+    result = compare(before, after, args.threshold)
+    print(json.dumps(result, indent=2))
+
+    sys.exit(1 if result['regressions'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Login rate limiter load test.
+
+Locks a handful of usernames out, then sends concurrent login attempts for
+them from many IPs, so every measured request costs one limiter round-trip,
+and prints latency percentiles per status as JSON. Set ``REDIS_URL`` to
+measure a real Redis::
+
+    REDIS_URL=redis://localhost:6379/0 python -m benchmarks.login_limiter
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+from benchmarks.common import bench_client, percentiles
+
+# isort: split
+from app.rate_limit import login_limiter
+
+
+async def run(attempts: int, concurrency: int, users: int, limit: int):
+    login_limiter.limit = limit
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = defaultdict(list)
+
+    async with bench_client() as client:
+        await login_limiter.reset(
+            *(f'user:user{index}' for index in range(users)),
+            *(f'ip:10.0.{index // 256}.{index % 256}' for index in range(attempts)),
+            'ip:10.255.255.255',
+        )
+
+        for index in range(users):
+            for _ in range(limit):
+                await client.post(
+                    '/auth/token',
+                    data={'username': f'user{index}', 'password': 'wrong'},
+                    headers={'X-Forwarded-For': '10.255.255.255'},
+                )
+
+        async def attempt(index: int):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    '/auth/token',
+                    data={'username': f'user{index % users}', 'password': 'wrong'},
+                    headers={'X-Forwarded-For': f'10.0.{index // 256}.{index % 256}'},
+                )
+                latencies[response.status_code].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(attempt(index) for index in range(attempts)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'attempts': attempts,
+        'concurrency': concurrency,
+        'requests_per_s': round(attempts / elapsed, 1),
+        'all': percentiles([
+            latency for samples in latencies.values() for latency in samples
+        ]),
+        'by_status': {
+            status: {'count': len(samples), **percentiles(samples)}
+            for status, samples in latencies.items()
+            if len(samples) > 1
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attempts', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--limit', type=int, default=5)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.attempts, args.concurrency, args.users, args.limit))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
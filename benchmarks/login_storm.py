@@ -0,0 +1,85 @@
+"""Login storm benchmark.
+
+Fires concurrent logins at the app while a probe keeps calling ``GET /`` and
+prints the probe latency percentiles as JSON. ``--inline`` hashes on the event
+loop, which is how ``app.security`` behaved before ``HashExecutor``::
+
+    python -m benchmarks.login_storm
+    python -m benchmarks.login_storm --inline
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from benchmarks.common import USER, bench_client, percentiles
+
+# isort: split
+from app import security
+
+
+async def run_inline(func, *args):
+    return func(*args)
+
+
+async def storm(logins: int, interval: float):
+    async with bench_client() as client:
+        await client.post('/users/', json=USER)
+
+        async def login():
+            return await client.post(
+                '/auth/token',
+                data={'username': USER['username'], 'password': USER['password']},
+            )
+
+        async def probe(done: asyncio.Event):
+            # Measured from the scheduled send time, so time spent waiting for a
+            # blocked event loop counts towards the latency.
+            latencies = []
+            while not done.is_set():
+                scheduled = time.perf_counter() + interval
+                await asyncio.sleep(interval)
+                await client.get('/')
+                latencies.append(time.perf_counter() - scheduled)
+
+            return latencies
+
+        async def storm_logins(done: asyncio.Event):
+            try:
+                return await asyncio.gather(*(login() for _ in range(logins)))
+            finally:
+                done.set()
+
+        done = asyncio.Event()
+        start = time.perf_counter()
+        responses, latencies = await asyncio.gather(storm_logins(done), probe(done))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'logins': logins,
+        'elapsed_s': round(elapsed, 3),
+        'login_statuses': dict(Counter(response.status_code for response in responses)),
+        'probes': len(latencies),
+        'probe': percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=0.005)
+    parser.add_argument('--inline', action='store_true')
+    args = parser.parse_args()
+
+    if args.inline:
+        security.hash_executor.run = run_inline
+
+    result = asyncio.run(storm(args.logins, args.interval))
+    result['mode'] = 'inline' if args.inline else 'executor'
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
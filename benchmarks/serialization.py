@@ -0,0 +1,113 @@
+"""List serialization microbenchmark.
+
+Loads a page of todos and users from an in-memory SQLite database and times
+the ``response_model`` path (ORM objects validated per row, then dumped)
+against the column select serialized by ``app.responses.dump_rows``::
+
+    python -m benchmarks.serialization --rows 100 --repeat 200
+"""
+
+import argparse
+import json
+import time
+import uuid
+
+from benchmarks.common import percentiles
+
+# isort: split
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Todo, TodoStatus, User, table_registry
+from app.responses import dump_rows, schema_columns
+from app.schemas import TodoPublic, UserPublic
+
+
+def seed(session: Session, rows: int):
+    user_ids = [uuid.uuid4() for _ in range(rows)]
+    session.execute(
+        insert(User),
+        [
+            {
+                'id': user_id,
+                'username': f'user {index}',
+                'email': f'user{index}@example.com',
+                'password': 'secret',
+            }
+            for index, user_id in enumerate(user_ids)
+        ],
+    )
+    session.execute(
+        insert(Todo),
+        [
+            {
+                'title': f'todo {index}',
+                'description': 'benchmark',
+                'status': TodoStatus.ACTIVE,
+                'user_id': user_ids[0],
+            }
+            for index in range(rows)
+        ],
+    )
+    session.commit()
+
+
+def timed(func, repeat: int, *args):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+
+    return percentiles(samples)
+
+
+def response_model_page(session: Session, adapter: TypeAdapter, model, rows: int):
+    objects = session.scalars(select(model).limit(rows)).all()
+    session.expunge_all()
+
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+
+def dump_rows_page(session: Session, schema, model, rows: int):
+    columns = select(*schema_columns(schema, model)).limit(rows)
+
+    return dump_rows(session.execute(columns).all(), schema)
+
+
+def run(rows: int, repeat: int):
+    engine = create_engine('sqlite://')
+    table_registry.metadata.create_all(engine)
+    results = {'rows': rows}
+
+    with Session(engine) as session:
+        seed(session, rows)
+
+        for schema, model in ((TodoPublic, Todo), (UserPublic, User)):
+            adapter = TypeAdapter(list[schema])
+            baseline = (session, adapter, model, rows)
+            fast_path = (session, schema, model, rows)
+            assert response_model_page(*baseline) == dump_rows_page(*fast_path)
+
+            results[schema.__name__] = {
+                'response_model': timed(response_model_page, repeat, *baseline),
+                'dump_rows': timed(dump_rows_page, repeat, *fast_path),
+            }
+
+    engine.dispose()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.rows, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,24 @@
 import os
+from contextlib import contextmanager
 
 import fakeredis
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///tests/test.db')
 
-from app.database import get_session
+from app.cache import PageCache, principal_cache, token_generation_cache
+from app.database import enable_sqlite_foreign_keys, get_session, instrument_engine
 from app.dependencies import get_current_user
 from app.main import app
 from app.models import table_registry
 from app.schemas import UserPublic
+from app.settings import get_settings
 
 false_id = '11111111-1111-1111-1111-111111111111'
 
@@ -56,12 +59,17 @@ def mock_sync_session_for_tasks(monkeypatch):
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
     )
+    event.listen(engine, 'connect', enable_sqlite_foreign_keys)
 
     test_sync_session = sessionmaker(bind=engine, expire_on_commit=False)
 
     monkeypatch.setattr(
         'app.tasks.cleanup_tasks.sync_session_factory', test_sync_session
     )
+    monkeypatch.setattr(
+        'app.tasks.cleanup_tasks.sync_redis_client',
+        fakeredis.FakeRedis(decode_responses=True),
+    )
 
     yield
 
@@ -75,6 +83,8 @@ async def session():
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
     )
+    instrument_engine(engine.sync_engine)
+    event.listen(engine.sync_engine, 'connect', enable_sqlite_foreign_keys)
 
     async with engine.connect() as conn:
         await conn.run_sync(table_registry.metadata.create_all)
@@ -88,6 +98,35 @@ async def session():
     await engine.dispose()
 
 
+@pytest.fixture
+def queries(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def assert_max_queries(queries):
+    """Fail if the block runs more than ``limit`` statements."""
+
+    @contextmanager
+    def assert_max_queries(limit: int):
+        queries.clear()
+        yield queries
+        assert len(queries) <= limit, (
+            f'{len(queries)} statements, expected at most {limit}:\n'
+            + '\n'.join(queries)
+        )
+
+    return assert_max_queries
+
+
 @pytest_asyncio.fixture
 async def client(session):
     def override_get_session():
@@ -100,13 +139,29 @@ async def client(session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    principal_cache.clear()
+    token_generation_cache.clear()
+    yield
+    principal_cache.clear()
+    token_generation_cache.clear()
+
+
 @pytest_asyncio.fixture(autouse=True)
 async def mock_redis(monkeypatch):
     fake_redis = fakeredis.aioredis.FakeRedis()
-    monkeypatch.setattr('app.routers.auth.r', fake_redis)
+    monkeypatch.setattr('app.rate_limit.login_limiter.redis', fake_redis)
     return fake_redis
 
 
+@pytest.fixture
+def page_cache(monkeypatch):
+    cache = PageCache(fakeredis.aioredis.FakeRedis(decode_responses=True), ttl=30)
+    monkeypatch.setattr('app.routers.todos.todo_page_cache', cache)
+    return cache
+
+
 def create_user(payload, client):
     response = client.post(
         '/users',
@@ -144,6 +199,20 @@ def auth_headers(access_token: str):
     return {'Authorization': f'Bearer {access_token}'}
 
 
+@pytest.fixture
+def stateless_auth_headers(client, user, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'STATELESS_ACCESS_TOKENS', True)
+    response = client.post(
+        '/auth/token',
+        data={
+            'username': users_payload[0]['username'],
+            'password': users_payload[0]['password'],
+        },
+    )
+
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
 @pytest.fixture
 def mock_get_current_user(client, user):
     def override_get_current_user():
@@ -12,3 +12,27 @@ def test_login_unauthorized(client, mock_authenticate_user):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Incorrect username or password.'}
+
+
+def test_login_too_many_attempts(client, mock_authenticate_user, monkeypatch):
+    monkeypatch.setattr('app.rate_limit.login_limiter.limit', 2)
+
+    for status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.TOO_MANY_REQUESTS):
+        response = client.post(
+            '/auth/token',
+            data={
+                'username': 'invalid_username',
+                'password': 'secret',
+            },
+        )
+
+        assert response.status_code == status
+
+
+def test_refresh_stateless_token(client, stateless_auth_headers):
+    response = client.get('/auth/token', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.OK
+
+    token = response.json()['access_token']
+    response = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,111 @@
+import time
+import uuid
+
+import fakeredis
+import pytest
+
+from app.cache import PageCache, PrincipalCache, TokenGenerationCache, TwoLevelCache
+from app.schemas import UserPublic
+
+principal = UserPublic(id=uuid.uuid4(), username='alice', email='alice@example.com')
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_evicts_least_recently_used():
+    cache = PrincipalCache(ttl=60, maxsize=1)
+
+    await cache.set('alice@example.com', principal)
+    await cache.set('bob@example.com', principal)
+
+    assert await cache.get('alice@example.com') is None
+    assert await cache.get('bob@example.com') == principal
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_bounded_by_token_exp():
+    cache = PrincipalCache(ttl=60, maxsize=10)
+
+    await cache.set('alice@example.com', principal, time.time() - 1)
+
+    assert await cache.get('alice@example.com') is None
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_disabled():
+    cache = PrincipalCache(ttl=0, maxsize=10)
+
+    await cache.set('alice@example.com', principal)
+
+    assert await cache.get('alice@example.com') is None
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_redis_tier(mock_redis):
+    cache = PrincipalCache(ttl=60, maxsize=10, redis=mock_redis)
+    await cache.set('alice@example.com', principal)
+
+    cache.clear()
+    assert await cache.get('alice@example.com') == principal
+
+    await cache.invalidate('alice@example.com')
+    cache.clear()
+    assert await cache.get('alice@example.com') is None
+
+
+@pytest.mark.asyncio
+async def test_token_generation_cache_redis_tier(mock_redis):
+    cache = TokenGenerationCache(ttl=60, maxsize=10, redis=mock_redis)
+    user_id = str(uuid.uuid4())
+    await cache.set(user_id, 0)
+
+    cache.clear()
+    assert await cache.get(user_id) == 0
+
+    await cache.invalidate(user_id)
+    cache.clear()
+    assert await cache.get(user_id) is None
+
+
+@pytest.mark.asyncio
+async def test_page_cache_roundtrip():
+    cache = PageCache(fakeredis.aioredis.FakeRedis(decode_responses=True), ttl=30)
+    user_id = uuid.uuid4()
+
+    assert await cache.get(user_id, '"1.abc"') is None
+    await cache.set(user_id, '"1.abc"', '[]', {'ETag': '"1.abc"'})
+
+    assert await cache.get(user_id, '"1.abc"') == ('[]', {'ETag': '"1.abc"'})
+    assert await cache.get(user_id, '"2.abc"') is None
+    assert cache.stats.as_dict() == {'hits': 1, 'misses': 2, 'errors': 0}
+
+
+@pytest.mark.asyncio
+async def test_page_cache_redis_unavailable():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = PageCache(fakeredis.aioredis.FakeRedis(server=server), ttl=30)
+
+    await cache.set(uuid.uuid4(), '"1"', '[]', {})
+
+    assert await cache.get(uuid.uuid4(), '"1"') is None
+    assert cache.stats.errors == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_page_cache_disabled():
+    cache = PageCache(fakeredis.aioredis.FakeRedis(), ttl=30, enabled=False)
+
+    await cache.set(uuid.uuid4(), '"1"', '[]', {})
+
+    assert await cache.get(uuid.uuid4(), '"1"') is None
+    assert cache.stats.as_dict() == {'hits': 0, 'misses': 0, 'errors': 0}
+
+
+def test_two_level_cache_requires_codec():
+    class EncodeOnlyCache(TwoLevelCache):
+        @staticmethod
+        def encode(value):
+            return str(value)
+
+    with pytest.raises(TypeError):
+        EncodeOnlyCache(ttl=60, maxsize=1)
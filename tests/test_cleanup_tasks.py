@@ -2,9 +2,18 @@ from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
 import freezegun
+from sqlalchemy import update
 
+from app.models import TodoCount
 from app.settings import get_settings
-from app.tasks.cleanup_tasks import trash_cleaner
+from app.tasks import cleanup_tasks
+from app.tasks.cleanup_tasks import (
+    purge_user,
+    reconcile_todo_counts,
+    tombstone_cleaner,
+    trash_cleaner,
+)
+from tests.conftest import create_todo, todos_payload
 
 settings = get_settings()
 
@@ -46,3 +55,87 @@ def test_todo_trash_cleaner_does_not_remove_before_expiry(
     response = client.get(TRASH_URL, headers=auth_headers)
     assert response.status_code == HTTPStatus.OK
     assert len(response.json()) == 1
+
+
+def test_todo_trash_cleaner_deletes_in_batches(
+    client, mock_sync_session_for_tasks, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(
+        'app.tasks.cleanup_tasks.settings.TODO_TRASH_CLEANUP_BATCH_SIZE', 2
+    )
+    monkeypatch.setattr(
+        'app.tasks.cleanup_tasks.settings.TODO_TRASH_CLEANUP_BATCH_PAUSE', 0
+    )
+    for index in range(5):
+        create_todo(
+            {**todos_payload[0], 'title': f'todo {index}'}, client, auth_headers
+        )
+
+    client.request('DELETE', '/todos/', json={'filter': {}}, headers=auth_headers)
+
+    cleanup_time = datetime.now(UTC).replace(tzinfo=None) + timedelta(
+        days=settings.TODO_TRASH_EXPIRE_DAYS
+    )
+    with freezegun.freeze_time(cleanup_time):
+        stats = trash_cleaner()
+
+    assert stats['deleted'] == 5  # noqa: PLR2004
+    assert stats['batches'] == 3  # noqa: PLR2004
+
+    response = client.get(TRASH_URL, headers=auth_headers)
+    assert response.json() == []
+
+
+def test_purge_user_skips_enabled_user(
+    client, mock_sync_session_for_tasks, user, todo, auth_headers
+):
+    assert purge_user(user['id']) == {'deleted': 0, 'batches': 0}
+
+    response = client.get('/todos/', headers=auth_headers)
+    assert len(response.json()) == 1
+
+
+def test_todo_trash_cleaner_updates_todo_stats(
+    client, mock_sync_session_for_tasks, delete_todo, auth_headers
+):
+    cleanup_time = datetime.now(UTC).replace(tzinfo=None) + timedelta(
+        days=settings.TODO_TRASH_EXPIRE_DAYS
+    )
+    with freezegun.freeze_time(cleanup_time):
+        trash_cleaner()
+
+    response = client.get('/todos/stats', headers=auth_headers)
+    assert response.json()['trash'] == 0
+
+
+def test_reconcile_todo_counts_repairs_drift(
+    client, mock_sync_session_for_tasks, todo, other_todo, auth_headers
+):
+    with cleanup_tasks.sync_session_factory() as session:
+        session.execute(update(TodoCount).values(count=TodoCount.count + 5))
+        session.commit()
+
+    stats = reconcile_todo_counts()
+
+    assert stats == {'users': 1, 'repaired': 1}
+    response = client.get('/todos/stats', headers=auth_headers)
+    assert response.json()['draft'] == 2  # noqa: PLR2004
+    assert reconcile_todo_counts()['repaired'] == 0
+
+
+def test_todo_trash_cleaner_leaves_tombstones(
+    client, mock_sync_session_for_tasks, delete_todo, todo, auth_headers
+):
+    cleanup_time = datetime.now(UTC).replace(tzinfo=None) + timedelta(
+        days=settings.TODO_TRASH_EXPIRE_DAYS
+    )
+    with freezegun.freeze_time(cleanup_time):
+        trash_cleaner()
+
+    response = client.get('/todos/changes', headers=auth_headers)
+    assert response.json()['deleted'] == [todo['id']]
+
+    with freezegun.freeze_time(
+        cleanup_time + timedelta(days=settings.TODO_TOMBSTONE_EXPIRE_DAYS)
+    ):
+        assert tombstone_cleaner() == 1
@@ -0,0 +1,63 @@
+import uuid
+from collections import Counter
+
+from sqlalchemy.dialects import postgresql
+
+from app.counters import status_deltas, status_update_returning, upsert_todo_counts
+from app.models import Todo, TodoStatus
+
+
+def test_status_update_returning_compiles_for_postgresql():
+    user_id = uuid.uuid4()
+    statement = status_update_returning(
+        [Todo.user_id == user_id, Todo.status != TodoStatus.TRASH],
+        {'status': TodoStatus.TRASH},
+    )
+
+    sql = ' '.join(str(statement.compile(dialect=postgresql.dialect())).split())
+
+    assert sql == (
+        'WITH "old" AS (SELECT todos.id AS id, todos.status AS old_status '
+        'FROM todos WHERE todos.user_id = %(user_id_1)s::UUID '
+        'AND todos.status != %(status_1)s FOR UPDATE) '
+        'UPDATE todos SET status=%(status)s, updated_at=now() '
+        'FROM "old" WHERE todos.id = "old".id '
+        'RETURNING todos.user_id, todos.title, todos.description, todos.status, '
+        'todos.id, todos.created_at, todos.updated_at, "old".old_status'
+    )
+
+
+def test_status_deltas_of_returned_rows():
+    user_id = uuid.uuid4()
+    rows = [
+        (Todo(user_id, 'a', 'a', status=TodoStatus.TRASH), TodoStatus.DRAFT),
+        (Todo(user_id, 'b', 'b', status=TodoStatus.TRASH), TodoStatus.ACTIVE),
+        (Todo(user_id, 'c', 'c', status=TodoStatus.TRASH), TodoStatus.TRASH),
+        (Todo(user_id, 'd', 'd', status=TodoStatus.TRASH), None),
+    ]
+
+    assert status_deltas(rows) == Counter({
+        (user_id, TodoStatus.DRAFT): -1,
+        (user_id, TodoStatus.ACTIVE): -1,
+        (user_id, TodoStatus.TRASH): 2,
+    })
+
+
+def test_upsert_todo_counts_adds_to_existing_counts():
+    user_id = uuid.uuid4()
+    statement = upsert_todo_counts(
+        postgresql.dialect(),
+        Counter({(user_id, TodoStatus.TRASH): 2, (user_id, TodoStatus.DRAFT): 0}),
+    )
+
+    sql = ' '.join(str(statement.compile(dialect=postgresql.dialect())).split())
+
+    assert sql.endswith(
+        'ON CONFLICT (user_id, status) '
+        'DO UPDATE SET count = (todo_counts.count + excluded.count)'
+    )
+    assert statement.compile().params['count_m0'] == 2  # noqa: PLR2004
+
+
+def test_upsert_todo_counts_without_deltas():
+    assert upsert_todo_counts(postgresql.dialect(), Counter()) is None
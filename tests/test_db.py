@@ -1,9 +1,20 @@
+import logging
+from http import HTTPStatus
 from typing import AsyncGenerator
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_session
+from app.database import (
+    async_engine,
+    engine_options,
+    get_session,
+    pool_stats,
+    redact_parameters,
+    track_queries,
+)
+from app.settings import get_settings
 
 
 @pytest.mark.asyncio
@@ -13,3 +24,68 @@ async def test_get_session():
     assert isinstance(db_gen, AsyncGenerator)
     db = await anext(db_gen)
     assert isinstance(db, AsyncSession)
+
+
+def test_engine_options_pgbouncer_disables_prepared_statements():
+    settings = get_settings().model_copy(update={'DB_PGBOUNCER': True})
+
+    options = engine_options('postgresql+psycopg://user:pass@db/app', settings)
+
+    assert options['connect_args'] == {'prepare_threshold': None}
+    assert options['pool_size'] == settings.DB_POOL_SIZE
+
+
+def test_engine_options_sqlite_has_no_driver_options():
+    options = engine_options('sqlite+aiosqlite:///tests/test.db', get_settings())
+
+    assert 'connect_args' not in options
+
+
+@pytest.mark.asyncio
+async def test_pool_records_checkout_wait():
+    checkouts = pool_stats.checkouts
+
+    async with async_engine.connect():
+        pass
+
+    assert pool_stats.checkouts == checkouts + 1
+    assert pool_stats.as_dict()['wait_max'] >= 0
+
+
+def test_redact_parameters():
+    assert redact_parameters({'email': 'alice@example.com'}, False) == {'email': '?'}
+    assert redact_parameters(('alice', 1), False) == ('?', '?')
+    assert redact_parameters([('alice',), ('bob',)], True) == '<2 parameter sets>'
+
+
+@pytest.mark.asyncio
+async def test_track_queries(session):
+    with track_queries() as stats:
+        await session.execute(select(1))
+        await session.execute(select(2))
+
+    assert stats.statements == 2  # noqa: PLR2004
+    assert stats.duration > 0
+
+
+def test_slow_query_log_redacts_parameters(client, user, monkeypatch, caplog):
+    monkeypatch.setattr('app.database.settings.DB_SLOW_QUERY_THRESHOLD', 0)
+
+    with caplog.at_level(logging.WARNING, logger='app.database'):
+        client.get(f'/users/{user["id"]}')
+
+    assert 'Slow query' in caplog.text
+    assert user['id'].replace('-', '') not in caplog.text
+    assert user['id'] not in caplog.text
+
+
+def test_server_timing_header_in_debug(client, auth_headers, monkeypatch):
+    response = client.get('/users/me', headers=auth_headers)
+    assert 'Server-Timing' not in response.headers
+
+    monkeypatch.setattr('app.metrics.settings.DEBUG', True)
+    response = client.get('/todos/', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert response.headers['Server-Timing'].endswith('desc="2 statements"')
@@ -1,5 +1,17 @@
+import uuid
+from datetime import datetime
 from http import HTTPStatus
 
+import jwt
+import pytest
+
+from app.cache import principal_cache
+from app.dependencies import get_valid_todo
+from app.models import Todo, TodoStatus, User
+from app.schemas import Principal
+from app.security import create_access_token, token_claims
+from app.settings import get_settings
+
 
 def test_get_valid_todos(client, auth_headers):
     response = client.patch(
@@ -9,3 +21,138 @@ def test_get_valid_todos(client, auth_headers):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Todo not found.'}
+
+
+async def add_todos(session, *todos: tuple[uuid.UUID, str, datetime, TodoStatus]):
+    user = User(username='alice', email='alice@example.com', password='secret')
+    session.add(user)
+
+    for todo_id, title, created_at, status in todos:
+        todo = Todo(
+            id=todo_id,
+            title=title,
+            description='description',
+            status=status,
+            user_id=user.id,
+        )
+        todo.created_at = created_at
+        session.add(todo)
+
+    await session.commit()
+
+    return Principal(id=user.id, email=user.email)
+
+
+@pytest.mark.asyncio
+async def test_get_valid_todo_title_tie_breaking(session):
+    older, newer = datetime(2026, 1, 1), datetime(2026, 1, 2)
+    principal = await add_todos(
+        session,
+        (uuid.UUID(int=1), 'same', older, TodoStatus.TRASH),
+        (uuid.UUID(int=2), 'same', newer, TodoStatus.ACTIVE),
+        (uuid.UUID(int=4), 'same', older, TodoStatus.ACTIVE),
+        (uuid.UUID(int=3), 'same', older, TodoStatus.ACTIVE),
+    )
+
+    db_todo = await get_valid_todo(session, principal, 'same')
+
+    assert db_todo.id == uuid.UUID(int=3)
+
+
+@pytest.mark.asyncio
+async def test_get_valid_todo_id_before_title(session):
+    created_at = datetime(2026, 1, 1)
+    principal = await add_todos(
+        session,
+        (uuid.UUID(int=1), str(uuid.UUID(int=2)), created_at, TodoStatus.ACTIVE),
+        (uuid.UUID(int=2), 'todo', created_at, TodoStatus.ACTIVE),
+    )
+
+    db_todo = await get_valid_todo(session, principal, str(uuid.UUID(int=2)))
+    assert db_todo.id == uuid.UUID(int=2)
+
+    db_todo = await get_valid_todo(session, principal, str(uuid.UUID(int=1)))
+    assert db_todo.id == uuid.UUID(int=1)
+
+
+def test_get_valid_todo_by_id_is_one_lookup(client, todo, auth_headers, queries):
+    queries.clear()
+    response = client.patch(
+        f'/todos/{todo["id"]}', json={'title': 'New title'}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    lookups = [query for query in queries if 'todos.status !=' in query]
+    assert len(lookups) == 1
+    assert 'todos.id = ' in lookups[0]
+    assert 'todos.title = ' not in lookups[0]
+
+
+def test_get_current_user_does_not_load_todos(
+    client, todo, other_todo, auth_headers, queries
+):
+    principal_cache.clear()
+    queries.clear()
+    response = client.get('/users/me', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(queries) == 1
+    assert 'todos' not in queries[0]
+
+
+def test_get_todos_query_count(client, todo, other_todo, auth_headers, queries):
+    principal_cache.clear()
+    queries.clear()
+    response = client.get('/todos/', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 2  # noqa: PLR2004
+    assert len(queries) == 3  # noqa: PLR2004
+
+
+def test_get_current_user_cached_principal(client, todo, auth_headers, queries):
+    queries.clear()
+    response = client.get('/users/me', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert queries == []
+
+
+def test_stateless_token_skips_user_lookup(
+    client, user, todo, stateless_auth_headers, queries
+):
+    response = client.get('/todos/', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.OK
+
+    principal_cache.clear()
+    queries.clear()
+    response = client.get('/todos/', headers=stateless_auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('users.email' in query for query in queries)
+    assert not any('token_generation' in query for query in queries)
+
+
+def test_stateless_token_claims(client, user, stateless_auth_headers):
+    token = stateless_auth_headers['Authorization'].removeprefix('Bearer ')
+    settings = get_settings()
+    payload = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
+
+    assert payload['sub'] == user['email']
+    assert payload['uid'] == user['id']
+    assert payload['gen'] == 0
+
+
+def test_stateless_token_stale_generation(client, user):
+    token = create_access_token(token_claims(user['email'], user['id'], 1))
+    response = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_stateless_token_invalid_user_id(client, user):
+    token = create_access_token({'sub': user['email'], 'uid': 'mock', 'gen': 0})
+    response = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import fakeredis
+import pytest
+
+from app.metrics import Counter, Histogram, Metric, record_trash_cleaner_run
+from app.tasks.cleanup_tasks import trash_cleaner
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency_seconds', 'Latency.', ('route',), buckets=(1, 2))
+    histogram.observe(0.5, '/a')
+    histogram.observe(1.5, '/a')
+    histogram.observe(3, '/a')
+
+    assert histogram.render().splitlines() == [
+        '# HELP latency_seconds Latency.',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="1"} 1',
+        'latency_seconds_bucket{route="/a",le="2"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.0',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_escapes_labels_and_reads_callback():
+    counter = Counter('hits_total', 'Hits.', ('path',))
+    counter.inc(2, 'a"b\\c')
+    callback_counter = Counter('misses_total', 'Misses.', callback=lambda: 4)
+
+    assert counter.render().splitlines()[-1] == r'hits_total{path="a\"b\\c"} 2'
+    assert callback_counter.render().splitlines()[-1] == 'misses_total 4'
+
+
+def test_metrics_endpoint(client, todo, auth_headers):
+    client.get('/todos/', headers=auth_headers)
+    client.get('/missing')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/todos/",status="200"}'
+    ) in response.text
+    assert 'route="<unmatched>",status="404"' in response.text
+    assert 'http_requests_in_flight 1' in response.text
+    assert 'db_pool_connections{state="checked_out"}' in response.text
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in response.text
+    assert 'login_limiter_redis_duration_seconds_count{operation="hit"}' in (
+        response.text
+    )
+    assert 'todo_page_cache_requests_total' in response.text
+
+
+def test_metrics_trash_cleaner_stats(client, mock_sync_session_for_tasks, monkeypatch):
+    server = fakeredis.FakeServer()
+    sync_redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr('app.tasks.cleanup_tasks.sync_redis_client', sync_redis)
+    monkeypatch.setattr(
+        'app.routers.metrics.redis_client',
+        fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+    )
+
+    trash_cleaner()
+    record_trash_cleaner_run(sync_redis, {'deleted': 3, 'batches': 1, 'duration': 0.5})
+    response = client.get('/metrics')
+
+    assert 'trash_cleaner_runs_total 2.0' in response.text
+    assert 'trash_cleaner_deleted_total 3.0' in response.text
+    assert 'trash_cleaner_last_duration_seconds 0.5' in response.text
+
+
+def test_metric_requires_samples():
+    with pytest.raises(TypeError):
+        Metric('untyped_total', 'No samples.')
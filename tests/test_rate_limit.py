@@ -0,0 +1,32 @@
+import pytest
+
+from app.rate_limit import SlidingWindowLimiter
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_limiter_blocks_at_limit(mock_redis):
+    limiter = SlidingWindowLimiter(mock_redis, prefix='test', limit=3, window=60)
+
+    assert await limiter.hit('user:alice', 'ip:1.1.1.1')
+    assert await limiter.hit('user:alice', 'ip:2.2.2.2')
+    assert not await limiter.hit('user:alice', 'ip:3.3.3.3')
+    assert await limiter.hit('user:bob', 'ip:3.3.3.3')
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_limiter_keys_expire(mock_redis):
+    limiter = SlidingWindowLimiter(mock_redis, prefix='test', limit=3, window=60)
+
+    await limiter.hit('user:alice')
+
+    assert 0 < await mock_redis.ttl('test:user:alice') <= limiter.window
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_limiter_reset(mock_redis):
+    limiter = SlidingWindowLimiter(mock_redis, prefix='test', limit=2, window=60)
+
+    await limiter.hit('user:alice')
+    await limiter.reset('user:alice')
+
+    assert await limiter.hit('user:alice')
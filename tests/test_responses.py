@@ -0,0 +1,36 @@
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.main import app
+from app.models import Todo, User
+from app.responses import dump_rows, schema_columns
+from app.schemas import TodoPublic, UserPublic
+
+
+@pytest.mark.asyncio
+async def test_dump_rows_matches_response_model(session, user, todo):
+    for schema, model in ((TodoPublic, Todo), (UserPublic, User)):
+        adapter = TypeAdapter(list[schema])
+        objects = (await session.scalars(select(model))).all()
+        rows = (await session.execute(select(*schema_columns(schema, model)))).all()
+
+        assert dump_rows(rows, schema) == adapter.dump_json(
+            adapter.validate_python(objects, from_attributes=True)
+        )
+
+
+@pytest.mark.parametrize(
+    ('path', 'schema'),
+    [
+        ('/todos/', 'TodoPublic'),
+        ('/todos/trash', 'TodoPublic'),
+        ('/users/', 'UserPublic'),
+    ],
+)
+def test_list_routes_keep_response_schema(path, schema):
+    response = app.openapi()['paths'][path]['get']['responses']['200']
+    response_schema = response['content']['application/json']['schema']
+
+    assert response_schema['type'] == 'array'
+    assert response_schema['items'] == {'$ref': f'#/components/schemas/{schema}'}
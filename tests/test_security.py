@@ -1,9 +1,15 @@
+import asyncio
+import threading
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
 
+import pytest
+from fastapi import HTTPException
 from freezegun import freeze_time
 
+from app.security import HashExecutor
+
 
 def test_authenticate_user_not_found(client):
     response = client.post(
@@ -64,3 +70,42 @@ def test_get_current_user_expired_token(client, user, auth_headers):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_password_hashing_overloaded(client, user, monkeypatch):
+    monkeypatch.setattr('app.security.hash_executor.max_pending', 0)
+
+    response = client.post(
+        '/auth/token',
+        data={
+            'username': user['username'],
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Server is busy, try again later.'}
+
+
+@pytest.mark.asyncio
+async def test_hash_executor_counts_jobs_until_they_finish():
+    executor = HashExecutor(max_workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hash_job():
+        started.set()
+        release.wait()
+
+    task = asyncio.create_task(executor.run(hash_job))
+    await asyncio.to_thread(started.wait)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert executor.pending == 1
+    with pytest.raises(HTTPException):
+        await executor.run(hash_job)
+
+    release.set()
+    executor.executor.shutdown(wait=True)
+    assert executor.pending == 0
@@ -1,7 +1,18 @@
+import csv
+import io
+import json
+import uuid
+from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
+import freezegun
+import pytest
+from sqlalchemy import select, update
+
+from app.models import User
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor
 from app.schemas import TodoPublic
-from tests.conftest import todos_payload
+from tests.conftest import create_todo, false_id, todos_payload
 
 
 def test_create_todo(client, auth_headers):
@@ -56,6 +67,37 @@ def test_get_todos_with_other_filter(client, auth_headers):
     )
 
 
+def test_get_todos_with_cursor(client, auth_headers):
+    for index in range(3):
+        create_todo(
+            {**todos_payload[0], 'title': f'todo {index}'}, client, auth_headers
+        )
+
+    response = client.get('/todos/?limit=2', headers=auth_headers)
+    assert response.status_code == HTTPStatus.OK
+    first_page = response.json()
+    assert len(first_page) == 2  # noqa: PLR2004
+
+    response = client.get(
+        '/todos/?limit=2',
+        params={'cursor': response.headers[NEXT_CURSOR_HEADER]},
+        headers=auth_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert NEXT_CURSOR_HEADER not in response.headers
+    assert sorted(todo['title'] for todo in first_page + response.json()) == [
+        'todo 0',
+        'todo 1',
+        'todo 2',
+    ]
+
+
+def test_get_todos_with_invalid_cursor(client, auth_headers):
+    response = client.get('/todos/?cursor=invalid', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 def test_get_deleted_todos(client, delete_todo, auth_headers):
     response = client.get(
         '/todos/trash',
@@ -113,6 +155,43 @@ def test_update_todo_data(client, todo, auth_headers):
     assert response.json()['title'] == 'New Title'
 
 
+def test_update_todo_data_by_title(client, todo, auth_headers):
+    response = client.patch(
+        f'/todos/{todo["title"]}',
+        headers=auth_headers,
+        json={'title': 'New Title'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {**todo, 'title': 'New Title'}
+
+
+def test_update_todo_data_without_returning(
+    client, session, todo, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(session.bind.dialect, 'update_returning', False)
+
+    response = client.patch(
+        f'/todos/{todo["title"]}',
+        headers=auth_headers,
+        json={'description': 'New description'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {**todo, 'description': 'New description'}
+
+
+def test_update_todo_data_not_found(client, todo, auth_headers):
+    response = client.patch(
+        f'/todos/{false_id}',
+        headers=auth_headers,
+        json={'title': 'New Title'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Todo not found.'}
+
+
 def test_delete_todo(client, todo, auth_headers):
     response = client.delete(
         f'/todos/{todo["id"]}',
@@ -120,3 +199,513 @@ def test_delete_todo(client, todo, auth_headers):
     )
 
     assert response.status_code == HTTPStatus.NO_CONTENT
+
+
+def test_create_todos_bulk(client, auth_headers, queries):
+    payload = [
+        {'title': f'todo {index}', 'description': 'bulk', 'status': 'ACTIVE'}
+        for index in range(3)
+    ] + [{'title': 'todo draft', 'description': 'bulk'}]
+
+    queries.clear()
+    response = client.post('/todos/bulk', json=payload, headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert [todo['title'] for todo in response.json()] == [
+        todo['title'] for todo in payload
+    ]
+    assert [todo['status'] for todo in response.json()] == [
+        'ACTIVE',
+        'ACTIVE',
+        'ACTIVE',
+        'DRAFT',
+    ]
+    assert sum(query.startswith('INSERT INTO todos') for query in queries) == 1
+
+
+def test_create_todos_bulk_too_many(client, auth_headers, monkeypatch):
+    monkeypatch.setattr('app.routers.todos.settings.TODO_BULK_MAX_SIZE', 1)
+
+    response = client.post(
+        '/todos/bulk',
+        json=[todos_payload[0], todos_payload[1]],
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Send between 1 and 1 todos.'}
+
+
+def test_create_todos_bulk_invalid_status(client, auth_headers):
+    response = client.post(
+        '/todos/bulk',
+        json=[{**todos_payload[0], 'status': 'TRASH'}],
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize('title', ['status', 'trash'])
+def test_create_todo_with_reserved_title(client, auth_headers, title):
+    response = client.post(
+        '/todos/', json={'title': title, 'description': 'x'}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_update_todo_to_reserved_title(client, todo, auth_headers):
+    response = client.patch(
+        f'/todos/{todo["id"]}', json={'title': 'status'}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_import_todo_with_reserved_title(client, auth_headers):
+    response = client.post(
+        '/todos/import',
+        files={
+            'file': (
+                'todos.ndjson',
+                json.dumps({'title': 'bulk', 'description': 'x'}).encode(),
+            )
+        },
+        headers=auth_headers,
+    )
+
+    assert json.loads(response.text.splitlines()[-1])['rejected'] == 1
+
+
+def test_update_todos_status_by_ids(client, todo, other_todo, auth_headers, queries):
+    queries.clear()
+    response = client.patch(
+        '/todos/status?status=COMPLETED',
+        json={'ids': [todo['id'], other_todo['id']]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert {todo['status'] for todo in response.json()} == {'COMPLETED'}
+    assert len(response.json()) == len(todos_payload)
+    assert sum(query.startswith('UPDATE todos') for query in queries) == 1
+
+
+def test_update_todos_status_by_filter(client, todo, other_todo, auth_headers):
+    response = client.patch(
+        '/todos/status?status=ACTIVE',
+        json={'filter': {'title': todo['title']}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [db_todo['id'] for db_todo in response.json()] == [todo['id']]
+
+
+def test_update_todos_status_unknown_ids(client, todo, auth_headers):
+    response = client.patch(
+        '/todos/status?status=ACTIVE',
+        json={'ids': [false_id]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == []
+
+
+def test_update_todos_status_invalid_selection(client, todo, auth_headers):
+    response = client.patch(
+        '/todos/status?status=ACTIVE',
+        json={'ids': [todo['id']], 'filter': {}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_delete_todos(client, todo, other_todo, auth_headers):
+    response = client.request(
+        'DELETE',
+        '/todos/',
+        json={'filter': {}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert {todo['status'] for todo in response.json()} == {'TRASH'}
+
+    response = client.get('/todos/trash', headers=auth_headers)
+    assert len(response.json()) == len(todos_payload)
+
+
+def test_export_todos_ndjson(client, todo, other_todo, auth_headers):
+    response = client.get('/todos/export', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(todo['id'] for todo in exported) == sorted([
+        todo['id'],
+        other_todo['id'],
+    ])
+    assert all(
+        isinstance(TodoPublic.model_validate(todo), TodoPublic) for todo in exported
+    )
+
+
+def test_export_todos_csv_with_filter(client, todo, other_todo, auth_headers):
+    response = client.get(
+        f'/todos/export?format=csv&title={todo["title"]}',
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert list(csv.DictReader(io.StringIO(response.text))) == [
+        {
+            'id': todo['id'],
+            'title': todo['title'],
+            'description': todo['description'],
+            'status': todo['status'],
+        }
+    ]
+
+
+def test_import_todos_ndjson(client, auth_headers, monkeypatch):
+    monkeypatch.setattr('app.importer.settings.TODO_IMPORT_CHUNK_SIZE', 2)
+    lines = [
+        json.dumps({'title': 'todo 1', 'description': 'imported'}),
+        json.dumps({'title': 'todo 2', 'description': 'imported', 'status': 'ACTIVE'}),
+        json.dumps({'title': 'todo 3', 'description': 'imported', 'status': 'TRASH'}),
+        '{not json',
+        json.dumps({'title': 'todo 4', 'description': 'imported'}),
+    ]
+
+    response = client.post(
+        '/todos/import',
+        files={'file': ('todos.ndjson', '\n'.join(lines).encode())},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    progress = [json.loads(line) for line in response.text.splitlines()]
+    assert progress == [
+        {'imported': 2, 'rejected': 0, 'errors': []},
+        {
+            'imported': 2,
+            'rejected': 2,
+            'errors': [
+                {'line': 3, 'detail': 'Invalid todo.'},
+                {'line': 4, 'detail': 'Invalid todo.'},
+            ],
+        },
+        {'imported': 3, 'rejected': 2, 'errors': []},
+    ]
+
+    response = client.get('/todos/', headers=auth_headers)
+    assert sorted(todo['title'] for todo in response.json()) == [
+        'todo 1',
+        'todo 2',
+        'todo 4',
+    ]
+
+
+def test_import_todos_csv(client, auth_headers):
+    content = 'title,description,status\ntodo 1,imported,PENDING\ntodo 2,imported,\n'
+
+    response = client.post(
+        '/todos/import?format=csv',
+        files={'file': ('todos.csv', content.encode())},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.text.splitlines()[-1]) == {
+        'imported': 2,
+        'rejected': 0,
+        'errors': [],
+    }
+
+    response = client.get('/todos/', headers=auth_headers)
+    assert sorted(todo['status'] for todo in response.json()) == ['DRAFT', 'PENDING']
+
+
+def test_import_todos_invalid_utf8(client, auth_headers):
+    content = json.dumps(todos_payload[0]).encode() + b'\n\xff\xfe\n'
+
+    response = client.post(
+        '/todos/import',
+        files={'file': ('todos.ndjson', content)},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.text.splitlines()[-1]) == {
+        'imported': 0,
+        'rejected': 0,
+        'errors': [],
+        'error': 'File is not valid UTF-8.',
+    }
+
+
+def test_import_todos_malformed_csv(client, auth_headers):
+    content = f'title,description\ntodo 1,{"x" * (csv.field_size_limit() + 1)}\n'
+
+    response = client.post(
+        '/todos/import?format=csv',
+        files={'file': ('todos.csv', content.encode())},
+        headers=auth_headers,
+    )
+
+    progress = json.loads(response.text.splitlines()[-1])
+    assert progress['imported'] == 0
+    assert progress['error'].startswith('Invalid CSV:')
+
+
+def test_get_todos_not_modified(client, todo, auth_headers, queries):
+    response = client.get('/todos/', headers=auth_headers)
+    etag = response.headers['ETag']
+
+    queries.clear()
+    response = client.get('/todos/', headers={**auth_headers, 'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not any('FROM todos' in query for query in queries)
+
+
+def test_get_todos_etag_depends_on_filter(client, todo, auth_headers):
+    response = client.get('/todos/', headers=auth_headers)
+    etag = response.headers['ETag']
+
+    response = client.get(
+        '/todos/?status=DRAFT', headers={**auth_headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+
+
+def test_get_deleted_todos_not_modified(client, delete_todo, auth_headers):
+    response = client.get('/todos/trash', headers=auth_headers)
+    etag = response.headers['ETag']
+
+    response = client.get(
+        '/todos/trash', headers={**auth_headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_get_todos_modified_after_update(client, todo, auth_headers):
+    response = client.get('/todos/', headers=auth_headers)
+    etag = response.headers['ETag']
+
+    client.patch(f'/todos/{todo["id"]}/status?status=COMPLETED', headers=auth_headers)
+    response = client.get('/todos/', headers={**auth_headers, 'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert response.json()[0]['status'] == 'COMPLETED'
+
+
+def test_update_todo_with_current_if_match(client, todo, auth_headers):
+    etag = client.get('/todos/', headers=auth_headers).headers['ETag']
+
+    response = client.patch(
+        f'/todos/{todo["id"]}',
+        headers={**auth_headers, 'If-Match': etag},
+        json={'title': 'New Title'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+
+
+def test_update_todo_with_stale_if_match(client, todo, other_todo, auth_headers):
+    etag = client.get('/todos/', headers=auth_headers).headers['ETag']
+    client.delete(f'/todos/{other_todo["id"]}', headers=auth_headers)
+
+    response = client.patch(
+        f'/todos/{todo["id"]}/status?status=COMPLETED',
+        headers={**auth_headers, 'If-Match': etag},
+    )
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert response.json() == {'detail': 'Todos were modified by another request.'}
+
+    response = client.get('/todos/', headers=auth_headers)
+    statuses = {db_todo['id']: db_todo['status'] for db_todo in response.json()}
+    assert statuses[todo['id']] == todo['status']
+
+
+def test_get_todos_from_page_cache(client, auth_headers, page_cache, queries):
+    for payload in todos_payload:
+        create_todo(payload, client, auth_headers)
+
+    response = client.get('/todos/?limit=1', headers=auth_headers)
+
+    queries.clear()
+    cached = client.get('/todos/?limit=1', headers=auth_headers)
+
+    assert cached.status_code == HTTPStatus.OK
+    assert cached.json() == response.json()
+    assert cached.headers['ETag'] == response.headers['ETag']
+    assert cached.headers[NEXT_CURSOR_HEADER] == response.headers[NEXT_CURSOR_HEADER]
+    assert not any('FROM todos' in query for query in queries)
+    assert page_cache.stats.as_dict() == {'hits': 1, 'misses': 1, 'errors': 0}
+
+
+def test_page_cache_invalidated_by_mutation(client, todo, auth_headers, page_cache):
+    client.get('/todos/', headers=auth_headers)
+    client.patch(f'/todos/{todo["id"]}/status?status=COMPLETED', headers=auth_headers)
+
+    response = client.get('/todos/', headers=auth_headers)
+
+    assert response.json()[0]['status'] == 'COMPLETED'
+    assert page_cache.stats.hits == 0
+
+
+def test_get_todo_stats_without_todos(client, auth_headers):
+    response = client.get('/todos/stats', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'draft': 0,
+        'active': 0,
+        'pending': 0,
+        'completed': 0,
+        'trash': 0,
+    }
+
+
+def test_todo_stats_follow_writes(client, todo, other_todo, auth_headers):
+    client.post(
+        '/todos/bulk',
+        json=[{'title': f'bulk {index}', 'description': 'bulk'} for index in range(2)],
+        headers=auth_headers,
+    )
+    client.post(
+        '/todos/import',
+        files={'file': ('todos.ndjson', json.dumps(todos_payload[0]).encode())},
+        headers=auth_headers,
+    )
+    client.patch(f'/todos/{todo["id"]}/status?status=COMPLETED', headers=auth_headers)
+    client.patch(f'/todos/{todo["id"]}/status?status=COMPLETED', headers=auth_headers)
+    client.delete(f'/todos/{other_todo["id"]}', headers=auth_headers)
+    client.request(
+        'DELETE', '/todos/', json={'filter': {'status': 'DRAFT'}}, headers=auth_headers
+    )
+
+    response = client.get('/todos/stats', headers=auth_headers)
+    assert response.json() == {
+        'draft': 0,
+        'active': 0,
+        'pending': 1,
+        'completed': 1,
+        'trash': 3,
+    }
+
+    client.delete('/todos/trash', headers=auth_headers)
+
+    response = client.get('/todos/stats', headers=auth_headers)
+    assert response.json()['trash'] == 0
+
+
+def test_get_todo_changes(client, todo, other_todo, auth_headers):
+    client.delete(f'/todos/{other_todo["id"]}', headers=auth_headers)
+    client.delete('/todos/trash', headers=auth_headers)
+
+    response = client.get('/todos/changes', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    changes = response.json()
+    assert [change['id'] for change in changes['todos']] == [todo['id']]
+    assert changes['deleted'] == [other_todo['id']]
+    assert changes['has_more'] is False
+
+
+def test_get_todo_changes_in_pages(client, todo, other_todo, auth_headers):
+    response = client.get('/todos/changes?limit=1', headers=auth_headers)
+    first = response.json()
+    assert first['has_more'] is True
+    assert len(first['todos']) == 1
+
+    response = client.get(
+        '/todos/changes',
+        params={'since': first['watermark'], 'limit': 1},
+        headers=auth_headers,
+    )
+    second = response.json()
+    assert {first['todos'][0]['id'], second['todos'][0]['id']} == {
+        todo['id'],
+        other_todo['id'],
+    }
+
+
+def test_get_todo_changes_resends_recent_changes(client, todo, auth_headers):
+    response = client.get('/todos/changes', headers=auth_headers)
+    watermark = response.json()['watermark']
+
+    response = client.get(
+        '/todos/changes', params={'since': watermark}, headers=auth_headers
+    )
+
+    assert [change['id'] for change in response.json()['todos']] == [todo['id']]
+
+
+def test_get_todo_changes_watermark_uses_database_clock(client, todo, auth_headers):
+    with freezegun.freeze_time(datetime.now(UTC) + timedelta(minutes=5)):
+        response = client.get('/todos/changes', headers=auth_headers)
+    watermark = response.json()['watermark']
+
+    response = client.get(
+        '/todos/changes', params={'since': watermark}, headers=auth_headers
+    )
+
+    assert [change['id'] for change in response.json()['todos']] == [todo['id']]
+
+
+def test_get_todo_changes_aware_watermark(client, todo, auth_headers):
+    since = encode_cursor(datetime.now(UTC) - timedelta(days=1), uuid.uuid4())
+
+    response = client.get(
+        '/todos/changes', params={'since': since}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [change['id'] for change in response.json()['todos']] == [todo['id']]
+
+
+def test_get_todo_changes_expired_watermark(client, auth_headers):
+    since = encode_cursor(datetime(2000, 1, 1), uuid.uuid4())
+
+    response = client.get(
+        '/todos/changes', params={'since': since}, headers=auth_headers
+    )
+
+    assert response.status_code == HTTPStatus.GONE
+
+
+def test_get_todo_changes_invalid_watermark(client, auth_headers):
+    response = client.get('/todos/changes?since=invalid', headers=auth_headers)
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_todo_writes_keep_user_updated_at(
+    client, session, user, todo, auth_headers
+):
+    profile_changed_at = datetime(2020, 1, 1)
+    await session.execute(update(User).values(updated_at=profile_changed_at))
+    await session.commit()
+
+    response = client.patch(
+        f'/todos/{todo["id"]}', json={'title': 'renamed'}, headers=auth_headers
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    session.expire_all()
+    assert await session.scalar(select(User.updated_at)) == profile_changed_at
@@ -1,7 +1,20 @@
+from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
+import freezegun
+import pytest
+from kombu.exceptions import OperationalError
+from sqlalchemy import func, select, update
+
+from app.models import Todo, User
+from app.pagination import NEXT_CURSOR_HEADER
 from app.schemas import UserPublic
-from tests.conftest import false_id, users_payload
+from app.settings import get_settings
+from app.tasks import cleanup_tasks
+from app.tasks.cleanup_tasks import purge_disabled_users, purge_user
+from tests.conftest import create_todo, false_id, todos_payload, users_payload
+
+settings = get_settings()
 
 
 def test_create_user(client):
@@ -57,6 +70,37 @@ def test_get_users(client, user):
     )
 
 
+def test_get_users_with_cursor(client, user, other_user, queries):
+    response = client.get('/users?limit=1')
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    queries.clear()
+    next_page = client.get('/users', params={'limit': 1, 'cursor': cursor})
+
+    assert next_page.status_code == HTTPStatus.OK
+    assert sorted(
+        db_user['username'] for db_user in response.json() + next_page.json()
+    ) == sorted([user['username'], other_user['username']])
+    assert not any('todos' in query for query in queries)
+
+
+def test_get_users_with_invalid_cursor(client):
+    response = client.get('/users?cursor=invalid')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_get_users_stream(client, user, other_user):
+    response = client.get('/users?stream=true')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert sorted(
+        UserPublic.model_validate_json(line).username
+        for line in response.text.splitlines()
+    ) == sorted([user['username'], other_user['username']])
+
+
 def test_get_me_user(client, auth_headers):
     response = client.get(
         '/users/me',
@@ -111,6 +155,23 @@ def test_update_user_email(client, user, auth_headers):
     assert isinstance(UserPublic.model_validate(response.json()), UserPublic)
 
 
+def test_update_user_email_invalidates_principal(client, user, auth_headers):
+    response = client.get('/users/me', headers=auth_headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.patch(
+        f'/users/{user["id"]}',
+        json={
+            'email': 'new_email@example.com',
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get('/users/me', headers=auth_headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
 def test_update_user_password(client, user, auth_headers):
     response = client.patch(
         f'/users/{user["id"]}',
@@ -125,6 +186,53 @@ def test_update_user_password(client, user, auth_headers):
     assert isinstance(UserPublic.model_validate(response.json()), UserPublic)
 
 
+def test_update_user_password_revokes_stateless_token(
+    client, user, stateless_auth_headers
+):
+    response = client.get('/todos/', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.patch(
+        f'/users/{user["id"]}',
+        json={'password': 'new_password'},
+        headers=stateless_auth_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    for path in ('/todos/', '/users/me'):
+        response = client.get(path, headers=stateless_auth_headers)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_update_user_username_keeps_stateless_token(
+    client, user, stateless_auth_headers
+):
+    response = client.patch(
+        f'/users/{user["id"]}',
+        json={'username': 'new_username'},
+        headers=stateless_auth_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get('/todos/', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_update_user_without_returning(
+    client, session, user, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(session.bind.dialect, 'update_returning', False)
+
+    response = client.patch(
+        f'/users/{user["id"]}',
+        json={'username': 'new_username'},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {**user, 'username': 'new_username'}
+
+
 def test_update_user_username_conflict(client, user, other_user, auth_headers):
     response = client.patch(
         f'/users/{user["id"]}',
@@ -177,6 +285,113 @@ def test_delete_user(client, user, auth_headers):
     assert response.status_code == HTTPStatus.NO_CONTENT
 
 
+def test_delete_user_invalidates_principal(client, user, auth_headers):
+    response = client.delete(
+        f'/users/{user["id"]}',
+        headers=auth_headers,
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.get('/users/me', headers=auth_headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_revokes_stateless_token(client, user, stateless_auth_headers):
+    response = client.get('/todos/', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.delete(f'/users/{user["id"]}', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.get('/todos/', headers=stateless_auth_headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_delete_user_cascades_todos(client, session, user, todo, auth_headers):
+    response = client.delete(f'/users/{user["id"]}', headers=auth_headers)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    assert await session.scalar(select(func.count()).select_from(Todo)) == 0
+
+
+def test_delete_large_user_purges_in_background(
+    client, user, auth_headers, mock_sync_session_for_tasks, monkeypatch
+):
+    monkeypatch.setattr('app.routers.users.settings.USER_PURGE_THRESHOLD', 1)
+    monkeypatch.setattr('app.tasks.cleanup_tasks.settings.USER_PURGE_BATCH_SIZE', 1)
+    monkeypatch.setattr('app.tasks.cleanup_tasks.settings.USER_PURGE_BATCH_PAUSE', 0)
+    queued = []
+    monkeypatch.setattr('app.routers.users.purge_user.delay', queued.append)
+    for payload in todos_payload:
+        create_todo(payload, client, auth_headers)
+
+    response = client.delete(f'/users/{user["id"]}', headers=auth_headers)
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert queued == [user['id']]
+
+    assert client.get('/users/me', headers=auth_headers).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+    assert client.get(f'/users/{user["id"]}').status_code == HTTPStatus.NOT_FOUND
+    response = client.post(
+        '/auth/token',
+        data={
+            'username': users_payload[0]['username'],
+            'password': users_payload[0]['password'],
+        },
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    stats = purge_user(user['id'])
+
+    assert stats['deleted'] == len(todos_payload)
+    assert stats['batches'] == len(todos_payload) + 1
+    response = client.post('/users/', json=users_payload[0])
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def test_delete_large_user_requeued_when_broker_is_down(
+    client, user, auth_headers, mock_sync_session_for_tasks, monkeypatch
+):
+    monkeypatch.setattr('app.routers.users.settings.USER_PURGE_THRESHOLD', 0)
+    create_todo(todos_payload[0], client, auth_headers)
+    queued = []
+
+    def broker_down(user_id):
+        raise OperationalError('broker unavailable')
+
+    monkeypatch.setattr('app.routers.users.purge_user.delay', broker_down)
+
+    response = client.delete(f'/users/{user["id"]}', headers=auth_headers)
+    assert response.status_code == HTTPStatus.ACCEPTED
+
+    monkeypatch.setattr('app.tasks.cleanup_tasks.purge_user.delay', queued.append)
+    assert purge_disabled_users() == 0
+
+    retry_time = datetime.now(UTC).replace(tzinfo=None) + timedelta(
+        seconds=settings.USER_PURGE_RETRY_AFTER
+    )
+    # A later write to the row does not push the retry back.
+    with cleanup_tasks.sync_session_factory() as session:
+        session.execute(update(User).values(updated_at=retry_time))
+        session.commit()
+
+    with freezegun.freeze_time(retry_time):
+        assert purge_disabled_users() == 1
+
+    assert queued == [user['id']]
+
+
+def test_delete_user_with_todos(client, user, todo, auth_headers):
+    response = client.delete(
+        f'/users/{user["id"]}',
+        headers=auth_headers,
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+
 def test_delete_user_not_found(client, mock_get_current_user):
     response = client.delete(
         f'/users/{false_id}',